@@ -0,0 +1,106 @@
+import os
+import sys
+import json
+import random
+import argparse
+import importlib.util
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.steam_network import get_all_card_names_from_html
+
+# Сверка потокового разбора страницы gamecards с прежней реализацией на BeautifulSoup.
+# card_names_corpus.json хранит фрагменты с особыми случаями и имена, которые для них вернул BeautifulSoup,
+# поэтому основная проверка работает без bs4. Если bs4 установлен, дополнительно сравниваются
+# случайные фрагменты (детерминированные по --seed)
+CORPUS_FILE = os.path.join(BENCH_DIR, "card_names_corpus.json")
+
+_TAGS = ["div", "span", "p", "b", "br", "img", "script", "style", "template"]
+_CLASSES = ["badge_card_set_card", "badge_card_set_text", "gamecard_card_name", "x", "badge_card_set_text ellipsis", ""]
+_SELF_CLOSING = ['<br/>', '<div/>', '<!--c-->', '<span class="gamecard_card_name"/>',
+                 '<div class="badge_card_set_card"/>', '</br>', '</img>']
+_TEXT = [' name ', 'x&amp;y', '  ', 'Ω', 'a b', '&#65;&lt;', 'var a="</div>";']
+
+
+def reference_card_names(html):
+    # Реализация до перехода на потоковый разбор
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    card_names = set()
+    for card_div in soup.select('div.badge_card_set_card div.badge_card_set_text'):
+        name = card_div.get_text(strip=True)
+        if name:
+            card_names.add(name)
+    if not card_names:
+        for n in soup.select('.gamecard_card_name'):
+            name = n.get_text(strip=True)
+            if name:
+                card_names.add(name)
+    return card_names
+
+
+def generate_fragments(count, seed):
+    rng = random.Random(seed)
+    fragments = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(1, 25)):
+            r, tag = rng.random(), rng.choice(_TAGS)
+            if r < 0.4:
+                parts.append(f'<{tag} class="{rng.choice(_CLASSES)}">')
+            elif r < 0.7:
+                parts.append(f'</{tag}>')
+            elif r < 0.8:
+                parts.append(rng.choice(_SELF_CLOSING))
+            else:
+                parts.append(rng.choice(_TEXT))
+        fragments.append("".join(parts))
+    return fragments
+
+
+def load_corpus():
+    with open(CORPUS_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(cases, expected_for, label):
+    mismatches = 0
+    for html in cases:
+        expected, actual = expected_for(html), set(get_all_card_names_from_html(html))
+        if expected != actual:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"  {html!r}\n    ожидалось {sorted(expected)}, получено {sorted(actual)}")
+    print(f"{label}: расхождений {mismatches} из {len(cases)}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сверка разбора страниц gamecards с BeautifulSoup")
+    parser.add_argument("--count", type=int, default=20000, help="Число случайных фрагментов (нужен bs4)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--record", action="store_true",
+                        help="Пересчитать ожидаемые имена в card_names_corpus.json через BeautifulSoup")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    if args.record:
+        for case in corpus:
+            case["names"] = sorted(reference_card_names(case["html"]))
+        with open(CORPUS_FILE, "w", encoding="utf-8") as f:
+            json.dump(corpus, f, ensure_ascii=False, indent=1)
+            f.write("\n")
+
+    expected = {case["html"]: set(case["names"]) for case in corpus}
+    mismatches = compare(list(expected), expected.__getitem__, "Корпус")
+    if importlib.util.find_spec("bs4") is None:
+        print("bs4 не установлен: случайные фрагменты не сверяются")
+    else:
+        mismatches += compare(generate_fragments(args.count, args.seed), reference_card_names, "Случайные фрагменты")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
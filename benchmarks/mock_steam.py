@@ -0,0 +1,275 @@
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from html import escape
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Локальная замена Steam для измерений: три сервера на разных портах изображают api.steampowered.com,
+# steamcommunity.com и store.steampowered.com. Ответы синтетические (детерминированные по appid и SteamID)
+# или записанные заранее; задержку и долю ответов 429 можно настраивать
+BASE_STEAM_ID = 76561190000000000
+FIRST_APPID = 10
+NO_CARDS_SHARE = 0.05
+OWNED_NAMES_SHARE = 0.9
+APP_LIST_NAMES_SHARE = 0.5
+# Цены в остальных валютах - пересчет долларовой цены по этому курсу (по умолчанию 1)
+CURRENCY_RATES = {1: 1.0, 3: 0.92, 5: 92.5}
+
+
+def account_steam_id(games):
+    return str(BASE_STEAM_ID + games)
+
+
+def _rng(*key):
+    return random.Random(hashlib.sha1(repr(key).encode("utf-8")).hexdigest())
+
+
+def card_set(appid):
+    # Примерно у 5% игр нет карточек: страница gamecards перенаправляет на список значков
+    rng = _rng("cards", appid)
+    if rng.random() < NO_CARDS_SHARE:
+        return []
+    return [f"{appid}-Card {i}" for i in range(1, rng.randint(5, 15) + 1)]
+
+
+def card_price(name):
+    return round(_rng("price", name).uniform(0.03, 2.5), 2)
+
+
+def game_name(appid):
+    return f"Synthetic Game {appid}"
+
+
+class SyntheticAccount:
+    def __init__(self, games):
+        self.steam_id = account_steam_id(games)
+        self.appids = [FIRST_APPID + 10 * i for i in range(games)]
+        rng = _rng("account", games)
+        self.levels = {appid: rng.choice((0, 0, 0, 1, 2, 3, 5)) for appid in self.appids}
+        self.assets = []
+        for appid in self.appids:
+            for card in card_set(appid):
+                copies = rng.choice((0, 0, 1, 1, 1, 2, 3))
+                self.assets.extend((card, appid) for _ in range(copies))
+
+    def badges(self):
+        return [{"appid": appid, "level": level} for appid, level in self.levels.items() if level]
+
+    def inventory_page(self, start, count):
+        page = self.assets[start:start + count]
+        classids = {}
+        assets = []
+        for offset, (card, appid) in enumerate(page):
+            classid = classids.setdefault(card, str(int(hashlib.sha1(card.encode("utf-8")).hexdigest()[:12], 16)))
+            assets.append({"appid": 753, "contextid": "6", "assetid": str(start + offset + 1),
+                           "classid": classid, "instanceid": "0", "amount": "1"})
+        descriptions = [{
+            "classid": classid, "instanceid": "0", "market_hash_name": card, "type": "Trading Card",
+            "tags": [{"category": "item_class", "internal_name": "item_class_2"},
+                     {"category": "Game", "internal_name": f"app_{card.split('-', 1)[0]}"}],
+        } for card, classid in classids.items()]
+        data = {"assets": assets, "descriptions": descriptions, "total_inventory_count": len(self.assets), "success": 1}
+        if start + count < len(self.assets):
+            data.update(more_items=1, last_assetid=str(start + count))
+        return data
+
+
+class MockSteam:
+    def __init__(self, accounts=(10,), latency=0.0, throttle_rate=0.0, retry_after=1, recordings=None, seed=0):
+        self.accounts = {account_steam_id(games): SyntheticAccount(games) for games in accounts}
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.recordings = recordings or {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._servers = {}
+        self.stats = {}
+
+    def start(self, host="127.0.0.1"):
+        for kind in ("api", "community", "store"):
+            server = ThreadingHTTPServer((host, 0), _make_handler(self, kind))
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self._servers[kind] = server
+        return self
+
+    def stop(self):
+        for server in self._servers.values():
+            server.shutdown()
+            server.server_close()
+        self._servers = {}
+
+    def environment(self):
+        # Переменные окружения, которые направляют src.core.steam_network на этот сервер
+        address = {kind: "http://%s:%d" % server.server_address for kind, server in self._servers.items()}
+        return {
+            "STEAM_API_BASE": address["api"],
+            "STEAM_COMMUNITY_BASE": address["community"],
+            "STEAM_STORE_API_BASE": address["store"] + "/api",
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {}
+
+    def snapshot(self):
+        with self._lock:
+            return {endpoint: dict(counters) for endpoint, counters in self.stats.items()}
+
+    def _count(self, endpoint, size, status):
+        with self._lock:
+            counters = self.stats.setdefault(endpoint, {"requests": 0, "bytes": 0, "throttled": 0})
+            counters["requests"] += 1
+            counters["bytes"] += size
+            counters["throttled"] += status == 429
+
+    def _should_throttle(self):
+        with self._lock:
+            return self.throttle_rate and self._random.random() < self.throttle_rate
+
+    def respond(self, kind, raw_path):
+        # Возвращает (endpoint, status, content_type, body, headers)
+        recorded = self.recordings.get(kind + raw_path) or self.recordings.get(kind + urlsplit(raw_path).path)
+        if recorded is not None:
+            body = recorded["body"] if isinstance(recorded["body"], str) else json.dumps(recorded["body"])
+            return ("recorded", recorded.get("status", 200), recorded.get("content_type", "application/json"),
+                    body.encode("utf-8"), {})
+        parts = urlsplit(raw_path)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        route = getattr(self, "_" + kind)
+        endpoint, status, payload, headers = route(parts.path.rstrip("/").split("/")[1:], query)
+        if isinstance(payload, (dict, list)):
+            return endpoint, status, "application/json", json.dumps(payload).encode("utf-8"), headers
+        return endpoint, status, "text/html; charset=utf-8", (payload or "").encode("utf-8"), headers
+
+    def _api(self, path, query):
+        method = "/".join(path[:2])
+        account = self.accounts.get(query.get("steamid"))
+        if method == "ISteamWebAPIUtil/GetSupportedAPIList":
+            return method, 200, {"apilist": {"interfaces": []}}, {}
+        if method == "IPlayerService/GetBadges" and account:
+            return method, 200, {"response": {"badges": account.badges()}}, {}
+        if method == "IPlayerService/GetOwnedGames" and account:
+            games = [{"appid": a, "name": game_name(a)} for a in account.appids
+                     if _rng("owned", a).random() < OWNED_NAMES_SHARE]
+            return method, 200, {"response": {"game_count": len(games), "games": games}}, {}
+        if method == "IStoreService/GetAppList":
+            last_appid, limit = int(query.get("last_appid", 0)), int(query.get("max_results", 10000))
+            known = sorted({a for acc in self.accounts.values() for a in acc.appids
+                            if a > last_appid and _rng("applist", a).random() < APP_LIST_NAMES_SHARE})[:limit]
+            apps = [{"appid": a, "name": game_name(a)} for a in known]
+            response = {"apps": apps}
+            if len(known) == limit:
+                response.update(have_more_results=True, last_appid=known[-1])
+            return method, 200, {"response": response}, {}
+        return method, 404, {}, {}
+
+    def _community(self, path, query):
+        if path[:1] == ["inventory"]:
+            account = self.accounts.get(path[1])
+            if not account:
+                return "inventory", 403, "null", {}
+            return "inventory", 200, account.inventory_page(int(query.get("start_assetid", 0)), int(query.get("count", 2000))), {}
+        if path[:1] == ["profiles"] and len(path) >= 4 and path[2] == "gamecards":
+            appid = int(path[3])
+            cards = card_set(appid)
+            if not cards:
+                return "gamecards", 302, None, {"Location": f"/profiles/{path[1]}/badges/"}
+            html = "".join(
+                f'<div class="badge_card_set_card owned"><img src="/card.png">'
+                f'<div class="badge_card_set_text ellipsis">{escape(card)}</div></div>'
+                for card in cards)
+            return "gamecards", 200, f"<html><body><div class=\"badge_detail_tasks\">{html}</div></body></html>", {}
+        if path[:1] == ["profiles"] and path[2:3] == ["badges"]:
+            return "badges_page", 200, "<html><body>No cards</body></html>", {}
+        if path[:3] == ["market", "search", "render"]:
+            appid = int(query.get("category_753_Game[]", "tag_app_0")[len("tag_app_"):])
+            # Поиск отдает большую часть набора, остальные карточки достаются через priceoverview
+            cards = [c for c in card_set(appid) if _rng("listed", c).random() < 0.8]
+            start, count = int(query.get("start", 0)), int(query.get("count", 100))
+            currency = int(query.get("currency", 1))
+            results = [{"hash_name": c, "sell_price_text": _price_text(card_price(c), currency)} for c in cards[start:start + count]]
+            return "market/search", 200, {"success": True, "start": start, "total_count": len(cards), "results": results}, {}
+        if path[:2] == ["market", "priceoverview"]:
+            name = query.get("market_hash_name", "")
+            price = _price_text(card_price(name), int(query.get("currency", 1)))
+            return "market/priceoverview", 200, {"success": True, "lowest_price": price, "median_price": price}, {}
+        return "community", 404, "", {}
+
+    def _store(self, path, query):
+        if path[-1:] == ["appdetails"]:
+            appid = query.get("appids", "")
+            return "appdetails", 200, {appid: {"success": True, "data": {"name": game_name(appid)}}}, {}
+        return "store", 404, {}, {}
+
+
+def _price_text(price, currency_id):
+    if currency_id == 1:
+        return f"${price:.2f}"
+    return f"{price * CURRENCY_RATES.get(currency_id, 1.0):.2f}".replace(".", ",") + " pуб."
+
+
+def _make_handler(mock, kind):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Заголовки и тело пишутся отдельно; без этого задержанное подтверждение TCP добавляет ~40 мс к каждому ответу
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            if mock.latency:
+                time.sleep(mock.latency)
+            if mock._should_throttle():
+                endpoint, status, content_type, body, headers = "throttled", 429, "text/plain", b"", {"Retry-After": str(mock.retry_after)}
+            else:
+                endpoint, status, content_type, body, headers = mock.respond(kind, self.path)
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+            mock._count(f"{kind}:{endpoint}", len(body), status)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def load_recordings(path):
+    if not path:
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный сервер, изображающий Steam, для замеров производительности")
+    parser.add_argument("--games", type=int, nargs="+", default=[10, 500, 5000], help="Размеры синтетических аккаунтов")
+    parser.add_argument("--latency", type=float, default=0.0, help="Задержка каждого ответа, с")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Доля ответов 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Значение Retry-After для ответов 429, с")
+    parser.add_argument("--recordings", help="JSON с записанными ответами: {\"<api|community|store><путь>\": {\"body\": ...}}")
+    args = parser.parse_args()
+
+    mock = MockSteam(args.games, args.latency, args.throttle_rate, args.retry_after,
+                     load_recordings(args.recordings)).start()
+    for name, value in mock.environment().items():
+        print(f"{name}={value}")
+    for games in args.games:
+        print(f"# {games} игр: --steam-id {account_steam_id(games)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from mock_steam import MockSteam, account_steam_id, load_recordings
+
+# Замеры идут против локального сервера, поэтому по умолчанию бюджеты запросов снимаются,
+# чтобы измерялась сама программа, а не паузы ограничителя (--steam-limits оставляет настоящие)
+FAST_BUDGET = {"rate": 1000.0, "min_rate": 100.0, "max_rate": 1000.0, "burst": 50}
+RUB_CURRENCY_ID = 5
+USD_CURRENCY_ID = 1
+
+
+def run_child(args):
+    # Каждый замер идет в отдельном процессе: так пиковая память и состояние модулей не смешиваются между прогонами
+    sys.path.insert(0, PROJECT_ROOT)
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr, format="%(levelname)s: %(message)s")
+    if args.tracemalloc:
+        tracemalloc.start()
+    from src.core.engine import AnalysisEngine
+    from src.core.steam_network import RATE_LIMITER
+
+    if not args.steam_limits:
+        for bucket in ("api", "store", "community", "market"):
+            RATE_LIMITER.configure(bucket, **FAST_BUDGET)
+
+    results, errors = [], []
+    engine = AnalysisEngine("benchmark-key", args.steam_id, args.currency_id, incremental=args.incremental,
+                            profile=args.profile, on_result=results.append, on_error=errors.append)
+    started, cpu_started = time.perf_counter(), time.process_time()
+    engine.run()
+    report = {
+        "wall": time.perf_counter() - started, "cpu": time.process_time() - cpu_started,
+        "results": len(results), "errors": errors, "peak_rss_mb": _peak_rss_mb(),
+        "metrics": engine.metrics_report(),
+    }
+    if args.tracemalloc:
+        report["peak_traced_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    print(json.dumps(report))
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает килобайты, macOS - байты
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def run_scenario(mock, games, phase, workdir, args):
+    steam_dir = os.path.join(workdir, "steam")
+    os.makedirs(steam_dir, exist_ok=True)
+    env = dict(os.environ, STEAM_PATH=steam_dir, **mock.environment())
+    # switch - повторный запуск в другой валюте: известные цены пересчитываются по курсу, выведенному из первых прогонов
+    currency_id = USD_CURRENCY_ID if phase == "switch" else RUB_CURRENCY_ID
+    command = [sys.executable, os.path.abspath(__file__), "--child", "--steam-id", account_steam_id(games),
+               "--currency-id", str(currency_id)]
+    command += [flag for flag, enabled in (("--steam-limits", args.steam_limits), ("--tracemalloc", args.tracemalloc), ("--profile", args.profile),
+                                          ("--incremental", phase == "warm" and args.incremental)) if enabled]
+    mock.reset_stats()
+    process = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"Замер {games}/{phase} завершился с ошибкой:\n{process.stderr}")
+    report = json.loads(process.stdout.strip().splitlines()[-1])
+    endpoints = mock.snapshot()
+    report.update(
+        games=games, phase=phase, endpoints=endpoints,
+        requests=sum(c["requests"] for c in endpoints.values()),
+        bytes=sum(c["bytes"] for c in endpoints.values()),
+        throttled=sum(c["throttled"] for c in endpoints.values()),
+    )
+    return report
+
+
+def print_table(reports):
+    header = f"{'игр':>6} {'прогон':>6} {'время, с':>9} {'CPU, с':>7} {'запросов':>9} {'МБ':>8} {'429':>5} {'RSS, МБ':>8} {'итогов':>7}"
+    print(header)
+    print("-" * len(header))
+    for r in reports:
+        rss = f"{r['peak_rss_mb']:.1f}" if r["peak_rss_mb"] is not None else "-"
+        print(f"{r['games']:>6} {r['phase']:>6} {r['wall']:>9.2f} {r['cpu']:>7.2f} {r['requests']:>9} "
+              f"{r['bytes'] / 2 ** 20:>8.2f} {r['throttled']:>5} {rss:>8} {r['results']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сквозной замер анализа на локальной замене Steam")
+    parser.add_argument("--games", type=int, nargs="+", default=[10, 500, 5000], help="Размеры синтетических аккаунтов")
+    parser.add_argument("--phases", nargs="+", default=["cold", "warm"], choices=["cold", "warm", "switch"],
+                        help="cold - с пустым кэшем, warm - повторный запуск с кэшем первого, "
+                             "switch - повторный запуск в другой валюте (USD)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Задержка каждого ответа сервера, с")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Доля ответов 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After для ответов 429, с")
+    parser.add_argument("--recordings", help="JSON с записанными ответами Steam, которые сервер отдает вместо синтетических")
+    parser.add_argument("--steam-limits", action="store_true", help="Не снимать бюджеты запросов к хостам")
+    parser.add_argument("--incremental", action="store_true", help="Повторный запуск в режиме \"только изменения\"")
+    parser.add_argument("--tracemalloc", action="store_true", help="Дополнительно мерить пик памяти Python через tracemalloc")
+    parser.add_argument("--profile", action="store_true",
+                        help="Запускать анализ в режиме профилирования; профили остаются в --keep-dir")
+    parser.add_argument("--keep-dir", help="Рабочий каталог замеров (кэш, результаты, профили) вместо временного")
+    parser.add_argument("--json", help="Сохранить подробный отчет в файл")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--steam-id", help=argparse.SUPPRESS)
+    parser.add_argument("--currency-id", type=int, default=RUB_CURRENCY_ID, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    mock = MockSteam(args.games, args.latency, args.throttle_rate, args.retry_after,
+                     load_recordings(args.recordings)).start()
+    reports = []
+    try:
+        for games in args.games:
+            with tempfile.TemporaryDirectory(prefix=f"steam-bench-{games}-") as workdir:
+                if args.keep_dir:
+                    workdir = os.path.join(os.path.abspath(args.keep_dir), str(games))
+                    os.makedirs(workdir, exist_ok=True)
+                for phase in args.phases:
+                    reports.append(run_scenario(mock, games, phase, workdir, args))
+                    print(f"{games} игр, {phase}: {reports[-1]['wall']:.2f} с", file=sys.stderr)
+    finally:
+        mock.stop()
+
+    print_table(reports)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import os
+import sys
+import csv
+import json
+import logging
+import argparse
+
+from .core.batch import BatchAnalysis, journal_path_for_account
+from .core.engine import AnalysisEngine
+from .core.metrics import summarize
+from .core.planner import BudgetPlanner
+from .core.price_store import PRICE_TTL
+from .core.profiling import profile_dir_for
+from .core.results_journal import RESULT_JOURNAL_FILE
+from .core.steam_network import CURRENCIES
+
+CSV_FIELDS = ["appid", "game", "level", "cost", "to_buy_count", "to_buy", "total_cost"]
+BATCH_CSV_FIELDS = ["account"] + CSV_FIELDS
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src",
+        description="Анализ значков Steam без графического интерфейса. Результаты выводятся в stdout."
+    )
+    parser.add_argument("--api-key", default=os.environ.get("STEAM_API_KEY"),
+                        help="Steam Web API Key (по умолчанию из переменной окружения STEAM_API_KEY)")
+    parser.add_argument("--steam-id", nargs="+", default=[], help="SteamID64 или Custom URL одного или нескольких профилей")
+    parser.add_argument("--accounts-file", help="Файл со списком аккаунтов, по одному в строке")
+    parser.add_argument("--currency", default="RUB", choices=sorted(CURRENCIES), help="Валюта цен")
+    parser.add_argument("--format", default="jsonl", choices=["jsonl", "csv"], help="Формат вывода")
+    parser.add_argument("--price-ttl-hours", type=float, default=PRICE_TTL / 3600,
+                        help="Сколько часов сохраненная цена считается свежей")
+    parser.add_argument("--budget", type=float,
+                        help="Бюджет: после анализа в stderr выводится, какие значки выгоднее всего скрафтить")
+    parser.add_argument("--refresh-converted", action="store_true",
+                        help="Запрашивать заново цены, пересчитанные из другой валюты, если исходная цена или курс устарели")
+    parser.add_argument("--resume", action="store_true", help="Продолжить прерванный анализ")
+    parser.add_argument("--incremental", action="store_true", help="Пересчитывать только изменившиеся игры")
+    parser.add_argument("--profile", action="store_true",
+                        help="Профилировать этапы анализа (cProfile и tracemalloc); профили сохраняются рядом с результатами")
+    parser.add_argument("--metrics", help="Сохранить итоговый отчет о времени этапов и запросах в JSON-файл")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Выводить ход анализа в stderr")
+    args = parser.parse_args(argv)
+    if not args.api_key:
+        parser.error("нужен --api-key или переменная окружения STEAM_API_KEY")
+    if args.accounts_file:
+        with open(args.accounts_file, 'r', encoding='utf-8') as f:
+            args.steam_id += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    if not args.steam_id:
+        parser.error("нужен --steam-id или --accounts-file")
+    return args
+
+
+def make_result_writer(fmt, stream, batch=False):
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, fieldnames=BATCH_CSV_FIELDS if batch else CSV_FIELDS)
+        writer.writeheader()
+
+        def write(result):
+            row = {
+                "appid": result["appid"], "game": result["game"], "level": result["level"],
+                "cost": f"{result['cost']:.2f}", "to_buy_count": result["to_buy_count"],
+                "to_buy": "; ".join(card["name"] for card in result["to_buy_list"]),
+                "total_cost": f"{result['total_cost']:.2f}",
+            }
+            if batch:
+                row["account"] = result["account"]
+            writer.writerow(row)
+            stream.flush()
+    else:
+        def write(result):
+            stream.write(json.dumps(result, ensure_ascii=False) + "\n")
+            stream.flush()
+    return write
+
+
+def print_plan(plan, currency, account=None):
+    prefix = f"{account}: " if account else ""
+    print(f"{prefix}можно скрафтить {plan['levels']} уровней значков (+{plan['xp']} XP) за {plan['spent']:.2f} {currency}, "
+          f"останется {plan['left']:.2f}", file=sys.stderr)
+    for entry in plan['results']:
+        result = entry['result']
+        print(f"  {result['appid']}\t+{entry['levels']}\t{entry['cost']:.2f}\t{result['game']}", file=sys.stderr)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr,
+                        format="%(levelname)s: %(message)s")
+
+    errors = []
+
+    def on_progress(value, maximum, text):
+        if args.verbose:
+            print(f"[{value}/{maximum}] {text}", file=sys.stderr)
+
+    def on_error(message):
+        errors.append(message)
+        print(f"Ошибка: {message}", file=sys.stderr)
+
+    reports = {}
+
+    def on_stats(account, report):
+        # Итоговый отчет приходит последним, поэтому для каждого аккаунта остается именно он
+        reports[account] = report
+        if args.verbose:
+            print(f"{account + ': ' if account else ''}{summarize(report)}", file=sys.stderr)
+
+    # У каждого аккаунта свой кошелек, поэтому и план строится отдельно для каждого
+    planners = {}
+
+    def plan_result(account, result):
+        if args.budget is not None:
+            planners.setdefault(account, BudgetPlanner(args.budget)).add(result)
+
+    currency_id = CURRENCIES[args.currency]["id"]
+    options = dict(price_ttl=args.price_ttl_hours * 3600, resume=args.resume, incremental=args.incremental,
+                   profile=args.profile, refresh_converted=args.refresh_converted)
+    batch = len(args.steam_id) > 1
+    if batch:
+        write = make_result_writer(args.format, sys.stdout, batch=True)
+
+        def on_batch_result(account, result):
+            write(dict(result, account=account))
+            plan_result(account, result)
+
+        runner = BatchAnalysis(
+            args.api_key, args.steam_id, currency_id, **options,
+            on_progress=lambda account, value, maximum, text: on_progress(value, maximum, f"{account}: {text}"),
+            on_result=on_batch_result,
+            on_error=lambda account, message: on_error(f"{account}: {message}"),
+            on_stats=on_stats,
+        )
+    else:
+        write = make_result_writer(args.format, sys.stdout)
+
+        def on_result(result):
+            write(result)
+            plan_result(None, result)
+
+        runner = AnalysisEngine(
+            args.api_key, args.steam_id[0], currency_id, **options,
+            on_progress=on_progress, on_result=on_result, on_error=on_error,
+            on_stats=lambda report: on_stats(None, report),
+        )
+    try:
+        runner.run()
+    except KeyboardInterrupt:
+        runner.cancel()
+        return 130
+    for account, planner in planners.items():
+        print_plan(planner.plan(), args.currency, account if batch else None)
+    if args.profile:
+        journals = [journal_path_for_account(a) for a in args.steam_id] if batch else [RESULT_JOURNAL_FILE]
+        print("Профили этапов сохранены в: " + ", ".join(profile_dir_for(j) for j in journals), file=sys.stderr)
+    if args.metrics:
+        with open(args.metrics, 'w', encoding='utf-8') as f:
+            json.dump(reports if batch else reports.get(None), f, ensure_ascii=False, indent=2)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
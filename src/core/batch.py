@@ -0,0 +1,76 @@
+import re
+import logging
+import threading
+
+from .context import AnalysisContext
+from .engine import AnalysisEngine
+from .price_store import PRICE_TTL, CONVERTED_PRICE_TTL
+from .results_journal import ResultsJournal
+
+
+def _ignore(*args):
+    pass
+
+
+def journal_path_for_account(account):
+    return "results_autosave_" + re.sub(r'[^\w.-]+', '_', account.strip()).strip('_') + ".jsonl"
+
+
+class BatchAnalysis:
+    # Последовательный анализ нескольких аккаунтов с общим контекстом: наборы карточек,
+    # названия и цены, полученные для одного аккаунта, переиспользуются для остальных,
+    # а все запросы проходят через один ограничитель скорости
+    def __init__(self, api_key, accounts, currency_id, language='russian', price_ttl=PRICE_TTL,
+                 resume=False, incremental=False, profile=False, refresh_converted=False,
+                 on_progress=None, on_result=None, on_error=None, on_finished=None, on_name_resolved=None,
+                 on_stats=None):
+        self.api_key = api_key
+        self.accounts = list(dict.fromkeys(a.strip() for a in accounts if a.strip()))
+        self.currency_id = currency_id
+        self.language = language
+        self.price_ttl = price_ttl
+        self.resume = resume
+        self.incremental = incremental
+        self.profile = profile
+        self.refresh_converted = refresh_converted
+        self.on_progress = on_progress or _ignore
+        self.on_result = on_result or _ignore
+        self.on_error = on_error or _ignore
+        self.on_finished = on_finished or _ignore
+        self.on_name_resolved = on_name_resolved or _ignore
+        self.on_stats = on_stats or _ignore
+        self._cancel_event = threading.Event()
+        self._engine = None
+
+    @property
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+        if self._engine:
+            self._engine.cancel()
+
+    def run(self):
+        context = AnalysisContext(self.price_ttl, parse_workers=0 if self.profile else None,
+                                  converted_ttl=CONVERTED_PRICE_TTL if self.refresh_converted else None)
+        try:
+            for index, account in enumerate(self.accounts):
+                if self.is_cancelled: break
+                logging.info(f"Аккаунт {index + 1}/{len(self.accounts)}: {account}")
+                self._engine = AnalysisEngine(
+                    self.api_key, account, self.currency_id, self.language, self.price_ttl,
+                    resume=self.resume, incremental=self.incremental, profile=self.profile, context=context,
+                    journal=ResultsJournal(journal_path_for_account(account)),
+                    on_progress=lambda value, maximum, text, a=account: self.on_progress(a, value, maximum, text),
+                    on_result=lambda result, a=account: self.on_result(a, result),
+                    on_error=lambda message, a=account: self.on_error(a, message),
+                    on_name_resolved=lambda appid, name, a=account: self.on_name_resolved(a, appid, name),
+                    on_stats=lambda report, a=account: self.on_stats(a, report),
+                )
+                if self.is_cancelled: break
+                self._engine.run()
+        finally:
+            self._engine = None
+            context.close()
+            self.on_finished()
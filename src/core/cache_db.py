@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+CACHE_DB_FILE = "steam_cache.db"
+LEGACY_CACHE_FILE = "steam_cache.json"
+COMMIT_BATCH_SIZE = 50
+COMMIT_INTERVAL = 2.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS game_names (appid INTEGER PRIMARY KEY, name TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS card_sets (appid INTEGER PRIMARY KEY, cards TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS missing_lookups (
+    kind TEXT NOT NULL,
+    appid INTEGER NOT NULL,
+    checked_at REAL NOT NULL,
+    PRIMARY KEY (kind, appid)
+);
+CREATE TABLE IF NOT EXISTS prices (
+    name TEXT NOT NULL,
+    currency_id INTEGER NOT NULL,
+    price REAL NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (name, currency_id)
+);
+CREATE TABLE IF NOT EXISTS exchange_rates (
+    currency_id INTEGER PRIMARY KEY,
+    rate REAL NOT NULL,
+    samples INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS app_states (
+    steam_id TEXT NOT NULL,
+    appid INTEGER NOT NULL,
+    currency_id INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    analysis TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (steam_id, appid, currency_id)
+);
+"""
+
+
+class CacheDB:
+    # Записи попадают в открытую транзакцию сразу и фиксируются пачками, а таймер фиксирует остаток
+    # не позже чем через COMMIT_INTERVAL: открытая транзакция держит блокировку записи, и другие процессы
+    # (соседний анализ, бенчмарк) иначе получали бы "database is locked". При падении теряются только
+    # последние несколько секунд работы
+    def __init__(self, path=CACHE_DB_FILE):
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+        self._flush_timer = None
+        self._closed = False
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate_json_cache()
+
+    def _migrate_json_cache(self, json_path=LEGACY_CACHE_FILE):
+        if self.get_meta("json_migrated") or not os.path.exists(json_path):
+            return
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            logging.warning(f"Не удалось перенести старый кэш {json_path}: {e}")
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO game_names (appid, name) VALUES (?, ?)",
+                [(int(a), n) for a, n in legacy.get("game_names", {}).items()])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO card_sets (appid, cards) VALUES (?, ?)",
+                [(int(a), json.dumps(c, ensure_ascii=False)) for a, c in legacy.get("card_sets", {}).items()])
+            rows = []
+            for key, (price, fetched_at) in legacy.get("prices", {}).items():
+                currency_id, name = key.split(":", 1)
+                rows.append((name, int(currency_id), price, fetched_at))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO prices (name, currency_id, price, fetched_at) VALUES (?, ?, ?, ?)", rows)
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)", (str(time.time()),))
+            self.commit()
+        logging.info(f"Кэш {json_path} перенесен в SQLite")
+
+    def _read_one(self, sql, params):
+        with self._lock:
+            if self._closed:
+                return None
+            return self._conn.execute(sql, params).fetchone()
+
+    def _write(self, sql, params, many=False):
+        with self._lock:
+            if self._closed:
+                return
+            if many:
+                self._conn.executemany(sql, params)
+            else:
+                self._conn.execute(sql, params)
+            self._uncommitted += 1
+            if self._uncommitted >= COMMIT_BATCH_SIZE or time.monotonic() - self._last_commit >= COMMIT_INTERVAL:
+                self.commit()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(COMMIT_INTERVAL, self.commit)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def commit(self):
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._closed:
+                return
+            self._conn.commit()
+            self._uncommitted = 0
+            self._last_commit = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self.commit()
+            self._closed = True
+            self._conn.close()
+
+    def get_meta(self, key):
+        row = self._read_one("SELECT value FROM meta WHERE key = ?", (key,))
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self._write("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def get_game_name(self, appid):
+        row = self._read_one("SELECT name FROM game_names WHERE appid = ?", (int(appid),))
+        return row[0] if row else None
+
+    def set_game_name(self, appid, name):
+        self._write("INSERT OR REPLACE INTO game_names (appid, name) VALUES (?, ?)", (int(appid), name))
+
+    def get_game_names(self, appids):
+        names = {}
+        appids = [int(a) for a in appids]
+        with self._lock:
+            if self._closed:
+                return names
+            for i in range(0, len(appids), 500):
+                chunk = appids[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT appid, name FROM game_names WHERE appid IN ({','.join('?' * len(chunk))})", chunk)
+                names.update(rows.fetchall())
+        return names
+
+    def add_game_names(self, rows):
+        # Массовая загрузка не затирает уже известные (локализованные) названия
+        if rows:
+            self._write("INSERT OR IGNORE INTO game_names (appid, name) VALUES (?, ?)", rows, many=True)
+
+    def get_card_set(self, appid):
+        row = self._read_one("SELECT cards FROM card_sets WHERE appid = ?", (int(appid),))
+        return json.loads(row[0]) if row else None
+
+    def set_card_set(self, appid, names):
+        self._write("INSERT OR REPLACE INTO card_sets (appid, cards) VALUES (?, ?)",
+                    (int(appid), json.dumps(names, ensure_ascii=False)))
+
+    def get_missing_checked_at(self, kind, appid):
+        # Время последней проверки, показавшей, что данных нет (набора карточек или названия игры)
+        row = self._read_one("SELECT checked_at FROM missing_lookups WHERE kind = ? AND appid = ?", (kind, int(appid)))
+        return row[0] if row else None
+
+    def set_missing(self, kind, appid):
+        self._write("INSERT OR REPLACE INTO missing_lookups (kind, appid, checked_at) VALUES (?, ?, ?)",
+                    (kind, int(appid), time.time()))
+
+    def get_price(self, name, currency_id):
+        return self._read_one("SELECT price, fetched_at FROM prices WHERE name = ? AND currency_id = ?",
+                              (name, currency_id))
+
+    def set_prices(self, rows):
+        # rows: [(market_hash_name, currency_id, price, fetched_at), ...]
+        if rows:
+            self._write("INSERT OR REPLACE INTO prices (name, currency_id, price, fetched_at) VALUES (?, ?, ?, ?)",
+                        rows, many=True)
+
+    def get_price_observations(self, names, exclude_currency_id, since=0):
+        # Цены тех же карточек в других валютах: [(name, currency_id, price, fetched_at), ...]
+        rows = []
+        with self._lock:
+            if self._closed:
+                return rows
+            for i in range(0, len(names), 500):
+                chunk = names[i:i + 500]
+                rows.extend(self._conn.execute(
+                    f"SELECT name, currency_id, price, fetched_at FROM prices WHERE name IN ({','.join('?' * len(chunk))}) "
+                    f"AND currency_id != ? AND fetched_at >= ?", chunk + [exclude_currency_id, since]).fetchall())
+        return rows
+
+    def get_exchange_rates(self):
+        with self._lock:
+            if self._closed:
+                return {}
+            rows = self._conn.execute("SELECT currency_id, rate, updated_at FROM exchange_rates").fetchall()
+        return {currency_id: (rate, updated_at) for currency_id, rate, updated_at in rows}
+
+    def set_exchange_rate(self, currency_id, rate, samples, updated_at):
+        self._write("INSERT OR REPLACE INTO exchange_rates (currency_id, rate, samples, updated_at) VALUES (?, ?, ?, ?)",
+                    (currency_id, rate, samples, updated_at))
+
+    def get_app_state(self, steam_id, appid, currency_id):
+        row = self._read_one("SELECT fingerprint, analysis FROM app_states WHERE steam_id = ? AND appid = ? AND currency_id = ?",
+                             (steam_id, int(appid), currency_id))
+        return (row[0], json.loads(row[1])) if row else None
+
+    def set_app_state(self, steam_id, appid, currency_id, fingerprint, analysis):
+        self._write("INSERT OR REPLACE INTO app_states (steam_id, appid, currency_id, fingerprint, analysis, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (steam_id, int(appid), currency_id, fingerprint, json.dumps(analysis, ensure_ascii=False), time.time()))
@@ -0,0 +1,42 @@
+import threading
+
+from .cache_db import CacheDB
+from .inflight import InFlightRequests
+from .parsing import ParseExecutor, PARSE_WORKERS
+from .price_store import PriceStore, PRICE_TTL
+from .steam_network import prepare_session
+from .steam_local import load_price_cache, load_local_card_sets, LazyPriceCache
+
+
+class AnalysisContext:
+    # Общие для нескольких запусков анализа ресурсы: HTTP-сессия, кэш, цены текущего запуска
+    # и локальные кэши Steam. Пакетный анализ нескольких аккаунтов использует один контекст,
+    # поэтому набор карточек игры и цена каждой карточки запрашиваются один раз
+    def __init__(self, price_ttl=PRICE_TTL, parse_workers=None, converted_ttl=None):
+        self.session = prepare_session()
+        self.parser = ParseExecutor(PARSE_WORKERS if parse_workers is None else parse_workers)
+        self.cache = CacheDB()
+        self.price_store = PriceStore(self.cache, price_ttl, converted_ttl)
+        self.prices = {}
+        self.inflight = InFlightRequests()
+        self.bulk_priced_appids = set()
+        self.refreshing_appids = set()
+        self.validated_api_keys = set()
+        self.local_price_cache = {}
+        self.local_card_sets = {}
+        self._local_caches_loaded = False
+        self._lock = threading.Lock()
+
+    def load_local_caches(self):
+        with self._lock:
+            if self._local_caches_loaded:
+                return
+            self.local_price_cache = load_price_cache()
+            self.local_card_sets = load_local_card_sets(self.parser)
+            self._local_caches_loaded = True
+
+    def close(self):
+        self.parser.shutdown()
+        self.cache.close()
+        if isinstance(self.local_price_cache, LazyPriceCache):
+            self.local_price_cache.close()
@@ -0,0 +1,601 @@
+import os
+import json
+import hashlib
+import logging
+import time
+import queue
+import threading
+import requests
+from itertools import accumulate
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .steam_network import (
+    safe_get, resolve_steamid64,
+    fetch_market_card_prices, parse_price_text, fetch_owned_game_names, iter_app_list,
+    STEAM_API_BASE, STEAM_COMMUNITY_BASE, STEAM_STORE_API_BASE, RATE_LIMITER
+)
+from .context import AnalysisContext
+from .inventory import InventoryCounter
+from .metrics import METRICS
+from .parsing import parse_card_names, parse_inventory_page
+from .price_store import PRICE_TTL, CONVERTED_PRICE_TTL
+from .profiling import StageProfiler, profile_dir_for
+from .results_journal import ResultsJournal
+from .steam_local import load_local_inventory
+
+MAX_PARALLEL_APPS = 8
+MAX_BADGE_LEVEL = 5
+# Меняется вместе с форматом результата, чтобы сохраненные анализы старого формата не переиспользовались
+ANALYSIS_VERSION = 2
+APP_LIST_TTL = 7 * 24 * 3600
+# Игры без карточек и без страницы в магазине запоминаются, чтобы не запрашивать их при каждом запуске;
+# проверка повторяется, когда запись устареет (карточки могут появиться у игры позже)
+MISSING_CARD_SET_TTL = 7 * 24 * 3600
+MISSING_NAME_TTL = 3 * 24 * 3600
+MAX_PARALLEL_REFRESHES = 4
+# Сколько анализ после обработки всех игр ждет фоновое обновление устаревших цен
+REFRESH_DRAIN_TIMEOUT = 60.0
+# Сколько анализ после обработки всех игр ждет уточнения названий; остальные названия уточнятся при следующем запуске
+NAMES_WAIT_TIMEOUT = 10.0
+CANCEL_POLL_INTERVAL = 0.2
+STATS_INTERVAL = 1.0
+
+
+def _ignore(*args):
+    pass
+
+
+class AnalysisEngine:
+    # Движок анализа без зависимости от Qt: о ходе работы он сообщает через обычные функции обратного вызова
+    def __init__(self, api_key, steam_id_input, currency_id, language='russian', price_ttl=PRICE_TTL,
+                 resume=False, incremental=False, profile=False, refresh_converted=False, context=None, journal=None,
+                 on_progress=None, on_result=None, on_error=None, on_finished=None, on_name_resolved=None,
+                 on_stats=None):
+        self.on_progress = on_progress or _ignore
+        self.on_result = on_result or _ignore
+        self.on_name_resolved = on_name_resolved or _ignore
+        self.on_error = on_error or _ignore
+        self.on_finished = on_finished or _ignore
+        self.on_stats = on_stats or _ignore
+        self.metrics = METRICS
+        self.profiler = StageProfiler() if profile else None
+        self._stats_sent_at = 0.0
+        self.api_key = api_key
+        self.steam_id_input = steam_id_input
+        self.currency_id = currency_id
+        self.language = language
+        self.steam_id = None
+        self.resume = resume
+        self.incremental = incremental
+        self._cancel_event = threading.Event()
+        # Останавливает фоновое уточнение названий: при отмене или когда анализ больше не может его ждать
+        self._names_stop = threading.Event()
+        # Останавливает фоновое обновление цен: при отмене, по истечении REFRESH_DRAIN_TIMEOUT и в конце анализа,
+        # чтобы после завершения run() обновления не писали в закрытый кэш
+        self._refresh_stop = threading.Event()
+        self.results = []
+        self._published = {}
+        self._names = {}
+        self._name_updates = queue.SimpleQueue()
+        self.journal = journal or ResultsJournal()
+        self._refresh_pool = None
+        self._refresh_futures = {}
+
+        # Если контекст передан снаружи (пакетный анализ), им владеет вызывающий код
+        self._owns_context = context is None
+        # При профилировании разбор идет в текущем процессе, иначе cProfile его не увидит.
+        # Цены, пересчитанные из другой валюты, обновляются из сети только при refresh_converted
+        self.context = context or AnalysisContext(price_ttl, parse_workers=0 if profile else None,
+                                                  converted_ttl=CONVERTED_PRICE_TTL if refresh_converted else None)
+        self.session = self.context.session
+        self.cache = self.context.cache
+        self.price_store = self.context.price_store
+        self.prices = self.context.prices
+        self._bulk_priced_appids = self.context.bulk_priced_appids
+        self._refreshing_appids = self.context.refreshing_appids
+
+        self.local_inventory, self.local_inv_appids = {}, set()
+        self.local_price_cache = {}
+        self.local_card_sets = {}
+
+    @property
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+        self._names_stop.set()
+        self._refresh_stop.set()
+
+    def run(self):
+        self.metrics.reset()
+        if self.profiler:
+            self.profiler.start()
+        try:
+            self.on_progress(0, 100, "Проверка API ключа...")
+            if self.api_key not in self.context.validated_api_keys:
+                with self._stage("stage.validate_key"):
+                    valid = self._validate_api_key()
+                if not valid:
+                    self.on_error("Невалидный API ключ.")
+                    return
+                self.context.validated_api_keys.add(self.api_key)
+
+            self.on_progress(10, 100, "Определение SteamID64...")
+            with self._stage("stage.resolve_steam_id"):
+                self.steam_id = resolve_steamid64(self.steam_id_input)
+            if not self.steam_id:
+                self.on_error("Не удалось определить SteamID64.")
+                return
+
+            # Локальные кэши Steam читаются уже в потоке анализа, чтобы не блокировать интерфейс
+            self.on_progress(15, 100, "Чтение локального кэша Steam...")
+            with self._stage("stage.local_caches"):
+                self.context.load_local_caches()
+            self.local_price_cache = self.context.local_price_cache
+            self.local_card_sets = self.context.local_card_sets
+
+            with self._stage("stage.inventory"):
+                # Загружаем локальный инвентарь для определенного steam_id
+                self.local_inventory, self.local_inv_appids = load_local_inventory(self.steam_id, self.context.parser)
+
+                if self.local_inventory:
+                    self.on_progress(20, 100, "Загрузка инвентаря (локально)...")
+                    self.metrics.incr("inventory.inventory_vdf")
+                    inventory_cards, inventory_appids = self.local_inventory, self.local_inv_appids
+                else:
+                    self.on_progress(20, 100, "Загрузка инвентаря (сеть)...")
+                    self.metrics.incr("inventory.network")
+                    inventory_cards, inventory_appids = self._get_user_inventory_from_api()
+
+            if inventory_cards is None:
+                self.on_error("Не удалось получить инвентарь. Проверьте приватность профиля.")
+                return
+
+            self.on_progress(30, 100, "Получение информации о значках...")
+            with self._stage("stage.badges"):
+                badges = self._get_user_badges()
+            badges_dict = {b["appid"]: b for b in badges if b.get("appid")}
+            appids_to_check = sorted(set(badges_dict.keys()) | inventory_appids)
+
+            if not appids_to_check:
+                self.on_error("Не найдено игр со значками для анализа.")
+                return
+
+            appids_to_check = [a for a in appids_to_check if badges_dict.get(a, {}).get("level", 0) < MAX_BADGE_LEVEL]
+
+            # Читаем прошлый журнал до того, как новый запуск его перезапишет
+            reused = {}
+            if self.resume:
+                reused = {appid: entry for appid, entry in
+                          self.journal.load_resumable(self.steam_id, self.currency_id, self.price_store.ttl).items()
+                          if "level_costs" in entry[0]}
+                if reused:
+                    logging.info(f"Продолжение анализа: {len(reused)} игр уже обработано")
+            self.journal.start(self.steam_id, self.currency_id)
+            levels = {a: badges_dict.get(a, {}).get("level", 0) for a in appids_to_check}
+            with self._stage("stage.pipeline", profile=False):
+                self._run_pipeline(appids_to_check, inventory_cards, levels, reused)
+
+        except Exception as e:
+            logging.error("Критическая ошибка в потоке анализа", exc_info=e)
+            self.on_error(f"Произошла непредвиденная ошибка: {e}")
+        finally:
+            if self._owns_context:
+                self.context.close()
+            if self.journal.count:
+                with self._stage("stage.compact"):
+                    self.journal.compact()
+            if self.profiler:
+                self.profiler.stop()
+                self.profiler.write(profile_dir_for(self.journal.path))
+            self._finish_metrics()
+            self.on_finished()
+
+    def _finish_metrics(self):
+        # Итоговый отчет сохраняется рядом с результатами и передается вызывающему коду
+        report = self.metrics_report()
+        path = os.path.splitext(self.journal.path)[0] + ".metrics.json"
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        except IOError as e:
+            logging.error(f"Не удалось сохранить отчет о замерах: {e}")
+        self.on_stats(report)
+
+    def metrics_report(self):
+        # rate_limits - текущий адаптивный темп запросов к каждому хосту (запросов в секунду)
+        return dict(self.metrics.snapshot(), steam_id=self.steam_id, currency_id=self.currency_id,
+                    results=len(self.results), rate_limits=RATE_LIMITER.rates())
+
+    def _report_stats(self):
+        now = time.monotonic()
+        if now - self._stats_sent_at >= STATS_INTERVAL:
+            self._stats_sent_at = now
+            self.on_stats(self.metrics_report())
+    
+    def _run_pipeline(self, appids, inventory_cards, levels, reused):
+        # Наборы карточек и цены разных игр запрашиваются параллельно, а общий темп задаёт
+        # только ограничитель запросов для каждого хоста. Названия игр не задерживают анализ:
+        # известные берутся из кэша одним запросом, остальные уточняются в фоне
+        self._names = self.cache.get_game_names(appids)
+        self.metrics.incr("name.steam_cache_db", len(self._names))
+        name_pool = ThreadPoolExecutor(max_workers=1)
+        # При профилировании игры разбираются по одной: cProfile каждого этапа видит только свой поток
+        app_pool = ThreadPoolExecutor(max_workers=1 if self.profiler else MAX_PARALLEL_APPS)
+        self._refresh_pool = ThreadPoolExecutor(max_workers=MAX_PARALLEL_REFRESHES)
+        try:
+            missing_names = [a for a in appids if a not in self._names]
+            names_future = name_pool.submit(self._timed, "stage.names", self._resolve_missing_names, missing_names) if missing_names else None
+
+            pending = [
+                (appid, None) if appid in reused else
+                (appid, app_pool.submit(self._timed, "app.total", self._analyze_app, appid, inventory_cards, levels[appid], profile=False))
+                for appid in appids
+            ]
+
+            total = len(pending)
+            for i, (appid, app_future) in enumerate(pending):
+                if appid in reused:
+                    if self.is_cancelled: break
+                    self._drain_name_updates()
+                    result, saved_at = reused[appid]
+                    self.metrics.incr("app.resumed")
+                    self._publish_result(dict(result, game=self._names.get(appid, result["game"])), saved_at)
+                    continue
+
+                analysis = self._wait_for(app_future)
+                if self.is_cancelled: break
+
+                self._drain_name_updates()
+                name = self._game_name(appid)
+                self.on_progress(i + 1, total, f"Анализ: {name} ({i+1}/{total})")
+                self._report_stats()
+                if analysis:
+                    self._emit_result(appid, name, analysis)
+
+            self._drain_refreshes()
+            if names_future and not self.is_cancelled and not names_future.done():
+                self.on_progress(total, total, "Уточнение названий игр...")
+                self._wait_for(names_future, NAMES_WAIT_TIMEOUT)
+            self._drain_name_updates()
+        finally:
+            self._names_stop.set()
+            self._refresh_stop.set()
+            name_pool.shutdown(wait=False, cancel_futures=True)
+            app_pool.shutdown(wait=False, cancel_futures=True)
+            self._refresh_pool.shutdown(wait=False, cancel_futures=True)
+
+    @contextmanager
+    def _stage(self, name, profile=True):
+        # Этапы, внутри которых есть другие этапы, только замеряются: вложенный cProfile сбил бы внешний
+        with self.metrics.span(name):
+            if self.profiler is None or not profile:
+                yield
+            else:
+                with self.profiler.stage(name, snapshot=name.startswith("stage.")):
+                    yield
+
+    def _timed(self, span, fn, *args, profile=True):
+        with self._stage(span, profile):
+            return fn(*args)
+
+    def _game_name(self, appid):
+        return self._names.get(appid) or f"Игра (AppID: {appid})"
+
+    def _drain_name_updates(self):
+        while True:
+            try:
+                appid, name = self._name_updates.get_nowait()
+            except queue.Empty:
+                return
+            self._names[appid] = name
+            result = self._published.get(appid)
+            if result is not None:
+                result["game"] = name
+                self.journal.append_name(appid, name)
+                self.on_name_resolved(appid, name)
+
+    def _resolve_missing_names(self, appids):
+        # Выполняется в фоне: сначала список игр аккаунта, затем общий список приложений Steam
+        # (обновляется не чаще раза в неделю) и лишь для оставшихся — медленный appdetails
+        unresolved = set(appids)
+
+        def found(names, source):
+            for appid, name in names:
+                if appid in unresolved:
+                    unresolved.discard(appid)
+                    self.metrics.incr(f"name.{source}")
+                    self._name_updates.put((appid, name))
+
+        owned = list(fetch_owned_game_names(self.session, self.api_key, self.steam_id, cancel_event=self._names_stop).items())
+        self.cache.add_game_names(owned)
+        found(owned, "owned_games")
+
+        updated_at = float(self.cache.get_meta("app_list_updated_at") or 0)
+        if unresolved and time.time() - updated_at > APP_LIST_TTL:
+            for page, is_last in iter_app_list(self.session, self.api_key, cancel_event=self._names_stop):
+                if self._names_stop.is_set(): return
+                self.cache.add_game_names(page)
+                found(page, "app_list")
+                if is_last:
+                    self.cache.set_meta("app_list_updated_at", str(time.time()))
+
+        for appid in sorted(unresolved):
+            if self._names_stop.is_set(): return
+            name = self._get_game_name(appid)
+            if self._names_stop.is_set(): return
+            self.metrics.incr("name.appdetails" if name else "name.unresolved")
+            if name:
+                self._name_updates.put((appid, name))
+
+    def _wait_for(self, future, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.is_cancelled and (deadline is None or time.monotonic() < deadline):
+            done, _ = wait([future], timeout=CANCEL_POLL_INTERVAL)
+            if done:
+                return future.result()
+        return None
+
+    def _analyze_app(self, appid, inventory_cards, level):
+        if self.is_cancelled: return None
+
+        appid_str = str(appid)
+        with self._stage("app.card_set"):
+            if appid_str in self.local_card_sets:
+                self.metrics.incr("card_set.communitycache_vdf")
+                all_cards = self.local_card_sets[appid_str]
+            else:
+                all_cards = self._get_card_set_info_from_api(appid)
+        if not all_cards: return None
+
+        # Отпечаток входных данных игры: уровень значка, состав набора и число имеющихся копий каждой карточки
+        fingerprint = hashlib.sha1(json.dumps(
+            [ANALYSIS_VERSION, level, sorted((cn, inventory_cards.get(cn, 0)) for cn in all_cards)], ensure_ascii=False
+        ).encode('utf-8')).hexdigest()
+        if self.incremental:
+            state = self.cache.get_app_state(self.steam_id, appid, self.currency_id)
+            if state and state[0] == fingerprint:
+                self.metrics.incr("app.reused")
+                return state[1]
+
+        analysis = self._compute_app(appid, all_cards, inventory_cards, level)
+        if analysis and not self.is_cancelled:
+            self.cache.set_app_state(self.steam_id, appid, self.currency_id, fingerprint, analysis)
+        return analysis
+
+    def _compute_app(self, appid, all_cards, inventory_cards, level):
+        # Все оставшиеся до максимума уровни считаются за один проход: карточка, которой есть count копий,
+        # закрывает count ближайших крафтов, а на каждый следующий ее нужно докупать. Цена каждой
+        # недостающей карточки запрашивается один раз, сколько бы копий ни понадобилось
+        remaining = max(MAX_BADGE_LEVEL - level, 1)
+        counts = {cn: inventory_cards.get(cn, 0) for cn in all_cards}
+        needed = {cn: remaining - count for cn, count in counts.items() if count < remaining}
+
+        with self._stage("app.prices"):
+            prices = self._get_prices(appid, list(needed)) if needed else {}
+        if self.is_cancelled: return None
+
+        # Карточка с count копиями входит в стоимость каждого крафта начиная с (count + 1)-го:
+        # цена добавляется в позицию count, а префиксная сумма разносит ее на все последующие уровни
+        level_costs = [0.0] * remaining
+        for cn, need in needed.items():
+            if prices[cn] is not None:
+                level_costs[remaining - need] += prices[cn]
+        level_costs = list(accumulate(level_costs))
+
+        to_buy_list = [{"name": cn, "price": prices[cn]} for cn in needed if counts[cn] == 0]
+        return {
+            "cost": level_costs[0], "to_buy_count": len(to_buy_list), "to_buy_list": to_buy_list,
+            "owned_list": [cn for cn in all_cards if counts[cn] > 0],
+            "level": level, "level_costs": level_costs, "total_cost": sum(level_costs),
+            "to_buy_total": [{"name": cn, "price": prices[cn], "count": need} for cn, need in needed.items()]
+        }
+
+    def _emit_result(self, appid, name, analysis):
+        self._publish_result(dict({"appid": appid, "game": name}, **analysis))
+
+    def _publish_result(self, result, saved_at=None):
+        self.results.append(result)
+        self._published[result["appid"]] = result
+        self.on_result(result)
+        self.journal.append(result, saved_at)
+
+    def _validate_api_key(self):
+        url = f"{STEAM_API_BASE}/ISteamWebAPIUtil/GetSupportedAPIList/v1/?key={self.api_key}"
+        response = safe_get(self.session, url, cancel_event=self._cancel_event)
+        return response and response.status_code == 200
+
+    def _get_user_badges(self):
+        url = f"{STEAM_API_BASE}/IPlayerService/GetBadges/v1/?key={self.api_key}&steamid={self.steam_id}"
+        response = safe_get(self.session, url, cancel_event=self._cancel_event)
+        return response.json().get("response", {}).get("badges", []) if response else []
+
+    def _get_user_inventory_from_api(self):
+        inventory, last_assetid = InventoryCounter(), None
+        while True:
+            if self.is_cancelled: return None, None
+            url = f"{STEAM_COMMUNITY_BASE}/inventory/{self.steam_id}/753/2?l=english&count=2000"
+            if last_assetid: url += f"&start_assetid={last_assetid}"
+
+            response = safe_get(self.session, url, cancel_event=self._cancel_event)
+            if not response: break
+            if self.is_cancelled: return None, None
+
+            page = self.context.parser.run(parse_inventory_page, response.content)
+            if not page: break
+
+            inventory.ingest(page)
+
+            if page["last_assetid"]:
+                last_assetid = page["last_assetid"]
+            else: break
+        return inventory.cards, inventory.appids
+
+    def _is_known_missing(self, kind, appid, ttl):
+        checked_at = self.cache.get_missing_checked_at(kind, appid)
+        return checked_at is not None and time.time() - checked_at < ttl
+
+    def _get_card_set_info_from_api(self, appid):
+        return self.context.inflight.run(("card_set", appid), self._load_card_set, appid)
+
+    def _load_card_set(self, appid):
+        cached = self.cache.get_card_set(appid)
+        if cached:
+            self.metrics.incr("card_set.steam_cache_db")
+            return cached
+        if self._is_known_missing("card_set", appid, MISSING_CARD_SET_TTL):
+            self.metrics.incr("card_set.missing_cached")
+            return None
+
+        url = f"{STEAM_COMMUNITY_BASE}/profiles/{self.steam_id}/gamecards/{appid}/"
+        response = safe_get(self.session, url, cancel_event=self._cancel_event)
+        if self.is_cancelled:
+            return None
+        if response and "gamecards" in response.url:
+            names = self.context.parser.run(parse_card_names, response.content, response.encoding)
+            if names:
+                self.metrics.incr("card_set.network")
+                self.cache.set_card_set(appid, names)
+                return names
+        # Запоминается только ответ Steam (перенаправление или страница без карточек), но не сетевая ошибка
+        if response:
+            self.cache.set_missing("card_set", appid)
+        self.metrics.incr("card_set.missing")
+        return None
+
+    def _get_game_name(self, appid):
+        return self.context.inflight.run(("name", appid), self._load_game_name, appid)
+
+    def _load_game_name(self, appid):
+        if self._is_known_missing("name", appid, MISSING_NAME_TTL):
+            self.metrics.incr("name.missing_cached")
+            return None
+        appid_str = str(appid)
+        url = f"{STEAM_STORE_API_BASE}/appdetails?appids={appid}&l={self.language}"
+        response = safe_get(self.session, url, cancel_event=self._names_stop)
+        if response:
+            try:
+                data = response.json() or {}
+            except ValueError:
+                return None
+            if data.get(appid_str, {}).get("success"):
+                name = data[appid_str]['data']['name']
+                self.cache.set_game_name(appid, name)
+                return name
+            self.cache.set_missing("name", appid)
+        return None
+
+    def _get_prices(self, appid, names):
+        prices = {}
+        missing, stale = [], []
+        for cn in names:
+            price = self.local_price_cache.get(cn)
+            source = "pricecache_vdf"
+            if price is None:
+                price, source = self.prices.get(cn), "memory"
+            if price is None:
+                price, fresh = self.price_store.get(cn, self.currency_id)
+                source = "steam_cache_db" if fresh else "steam_cache_db_stale"
+                if price is None:
+                    price, fresh = self.price_store.convert(cn, self.currency_id)
+                    source = "converted" if fresh else "converted_stale"
+                if price is None:
+                    missing.append(cn)
+                elif not fresh:
+                    stale.append(cn)
+            if price is not None:
+                self.metrics.incr(f"price.{source}")
+            prices[cn] = price
+
+        if stale:
+            self._schedule_price_refresh(appid, stale)
+
+        if missing and not self.is_cancelled:
+            self._fetch_market_prices(appid)
+
+        for cn in missing:
+            price, source = self.prices.get(cn), "market_search"
+            if price is None:
+                price, source = self._fetch_and_store_price(cn), "network"
+            self.metrics.incr(f"price.{source if price is not None else 'unknown'}")
+            prices[cn] = price
+        return prices
+
+    def _fetch_market_prices(self, appid, stop=None):
+        # Поиск по игре выполняется один раз; если его уже начало фоновое обновление,
+        # анализ дожидается результата вместо того, чтобы запрашивать каждую цену отдельно
+        self.context.inflight.run(("market_search", appid), self._load_market_prices, appid, stop or self._cancel_event)
+
+    def _load_market_prices(self, appid, stop):
+        if appid in self._bulk_priced_appids or stop.is_set():
+            return
+        self._bulk_priced_appids.add(appid)
+        self._store_prices(fetch_market_card_prices(self.session, appid, self.currency_id, cancel_event=stop))
+        if stop.is_set():
+            # Поиск прерван и мог вернуть не все цены - при следующем запросе его нужно повторить
+            self._bulk_priced_appids.discard(appid)
+
+    def _fetch_and_store_price(self, name, stop=None):
+        return self.context.inflight.run(("price", name, self.currency_id), self._load_price, name, stop or self._cancel_event)
+
+    def _load_price(self, name, stop):
+        price = self.prices.get(name)
+        if price is None:
+            price = self._fetch_price(name, stop)
+            if price is not None:
+                self._store_prices({name: price})
+        return price
+
+    def _store_prices(self, prices):
+        self.prices.update(prices)
+        self.price_store.put_many(prices, self.currency_id)
+
+    def _schedule_price_refresh(self, appid, names):
+        # Устаревшие цены используются сразу, а обновляются в фоне, пока идет анализ
+        if appid in self._refreshing_appids or self._refresh_pool is None:
+            return
+        self._refreshing_appids.add(appid)
+        self._refresh_futures[appid] = self._refresh_pool.submit(self._refresh_prices, appid, names)
+
+    def _drain_refreshes(self):
+        # На быстром повторном запуске игры обрабатываются раньше, чем успевают обновиться цены,
+        # поэтому перед завершением оставшиеся обновления дожидаются (не дольше REFRESH_DRAIN_TIMEOUT);
+        # не успевшие останавливаются через _refresh_stop и будут выполнены при следующем запуске
+        pending = {f for f in self._refresh_futures.values() if not f.done()}
+        total = len(self._refresh_futures)
+        deadline = time.monotonic() + REFRESH_DRAIN_TIMEOUT
+        while pending and not self.is_cancelled and time.monotonic() < deadline:
+            self.on_progress(total - len(pending), total, "Обновление цен...")
+            _, pending = wait(pending, timeout=CANCEL_POLL_INTERVAL)
+        if pending:
+            self._refresh_stop.set()
+            logging.info(f"Не дождались обновления цен для {len(pending)} игр")
+            for appid, future in self._refresh_futures.items():
+                if future in pending:
+                    self._refreshing_appids.discard(appid)
+
+    def _refresh_prices(self, appid, names):
+        if self._refresh_stop.is_set(): return
+        self._fetch_market_prices(appid, self._refresh_stop)
+        for cn in names:
+            if self._refresh_stop.is_set(): return
+            if cn not in self.prices:
+                self._fetch_and_store_price(cn, self._refresh_stop)
+
+    def _fetch_price(self, name, stop):
+        if stop.is_set(): return None
+        
+        url = f"{STEAM_COMMUNITY_BASE}/market/priceoverview/?appid=753&currency={self.currency_id}&market_hash_name={requests.utils.quote(name)}"
+        headers = {"Referer": f"{STEAM_COMMUNITY_BASE}/market/search?appid=753"}
+        response = safe_get(self.session, url, headers=headers, cancel_event=stop)
+        
+        if response:
+            try:
+                data = response.json()
+                if data and data.get("success"):
+                    return parse_price_text(data.get("lowest_price") or data.get("median_price"))
+            except (json.JSONDecodeError, ValueError) as e:
+                logging.error(f"Ошибка парсинга цены для '{name}': {e}")
+        return None
\ No newline at end of file
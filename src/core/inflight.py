@@ -0,0 +1,36 @@
+import threading
+from concurrent.futures import Future
+
+from .metrics import METRICS
+
+
+class InFlightRequests:
+    # Одновременные запросы с одинаковым ключом выполняются один раз: первый вызов идет в сеть,
+    # остальные дожидаются его результата. Сам результат здесь не хранится - повторные вызовы
+    # после завершения запроса находят его в кэше, который проверяет переданная функция
+    def __init__(self, metrics=None):
+        self.metrics = metrics or METRICS
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def run(self, key, fn, *args):
+        with self._lock:
+            future = self._calls.get(key)
+            owner = future is None
+            if owner:
+                future = self._calls[key] = Future()
+        if not owner:
+            self.metrics.incr("inflight.shared")
+            return future.result()
+
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
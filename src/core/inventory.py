@@ -0,0 +1,71 @@
+from array import array
+
+
+class CardCounter:
+    # Имена карточек интернируются в целочисленные ID, а количество копий хранится в array('I').
+    # Интерфейс get()/__contains__/__len__ совпадает со словарем {market_hash_name: количество}
+    def __init__(self):
+        self._ids = {}
+        self.names = []
+        self.counts = array('I')
+
+    def intern(self, name):
+        card_id = self._ids.get(name)
+        if card_id is None:
+            card_id = len(self.names)
+            self._ids[name] = card_id
+            self.names.append(name)
+            self.counts.append(0)
+        return card_id
+
+    def add(self, card_id, count=1):
+        self.counts[card_id] += count
+
+    def get(self, name, default=0):
+        card_id = self._ids.get(name)
+        return default if card_id is None else self.counts[card_id]
+
+    def __contains__(self, name):
+        return self.get(name) > 0
+
+    def __len__(self):
+        return sum(1 for c in self.counts if c)
+
+    def items(self):
+        return ((name, count) for name, count in zip(self.names, self.counts) if count)
+
+
+class InventoryCounter:
+    # Постраничный подсчет инвентаря: считаются предметы (assets), а не описания, с привязкой по classid.
+    # Копии, описание которых еще не встретилось, ждут в pending до появления описания на следующих страницах.
+    # classid остальных предметов (смайлики, фоны, металлические карточки, самоцветы) запоминаются,
+    # чтобы их копии не копились в pending
+    def __init__(self):
+        self.cards = CardCounter()
+        self.appids = set()
+        self._card_ids = {}
+        self._other_classids = set()
+        self._pending = {}
+
+    def ingest(self, page):
+        for classid, (name, appid) in page["cards"].items():
+            if classid in self._card_ids:
+                continue
+            card_id = self.cards.intern(name)
+            self._card_ids[classid] = card_id
+            if appid:
+                self.appids.add(appid)
+            pending = self._pending.pop(classid, 0)
+            if pending:
+                self.cards.add(card_id, pending)
+
+        for classid in page["other_classids"]:
+            self._other_classids.add(classid)
+            self._pending.pop(classid, None)
+
+        for classid, count in page["asset_counts"].items():
+            card_id = self._card_ids.get(classid)
+            if card_id is not None:
+                self.cards.add(card_id, count)
+            elif classid not in self._other_classids:
+                self._pending[classid] = self._pending.get(classid, 0) + count
@@ -0,0 +1,93 @@
+import time
+import threading
+from contextlib import contextmanager
+
+
+class Metrics:
+    # Потокобезопасные счетчики и интервалы времени этапов анализа. Интервал с одним именем может
+    # выполняться много раз (например, для каждой игры), поэтому хранятся число, сумма и максимум
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spans = {}
+        self._counters = {}
+        self._waiting = {}
+        self._started = time.time()
+
+    def reset(self):
+        with self._lock:
+            self._spans, self._counters, self._waiting = {}, {}, {}
+            self._started = time.time()
+
+    @contextmanager
+    def span(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, time.perf_counter() - started)
+
+    @contextmanager
+    def waiting(self, name):
+        # Ожидание в нескольких потоках сразу: {name}_seconds - сумма по потокам,
+        # {name}_wall_seconds - реальное время, когда ждал хотя бы один поток
+        started = time.perf_counter()
+        with self._lock:
+            count, since = self._waiting.get(name, (0, started))
+            self._waiting[name] = (count + 1, since)
+        try:
+            yield
+        finally:
+            ended = time.perf_counter()
+            with self._lock:
+                total = f"{name}_seconds"
+                self._counters[total] = self._counters.get(total, 0) + ended - started
+                count, since = self._waiting.get(name, (1, started))
+                if count > 1:
+                    self._waiting[name] = (count - 1, since)
+                else:
+                    self._waiting.pop(name, None)
+                    wall = f"{name}_wall_seconds"
+                    self._counters[wall] = self._counters.get(wall, 0) + ended - since
+
+    def add_span(self, name, seconds):
+        with self._lock:
+            span = self._spans.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+            span["count"] += 1
+            span["total"] += seconds
+            span["max"] = max(span["max"], seconds)
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "started_at": self._started, "elapsed": time.time() - self._started,
+                "spans": {name: dict(span) for name, span in sorted(self._spans.items())},
+                "counters": dict(sorted(self._counters.items())),
+            }
+
+
+def summarize(snapshot):
+    # Короткая строка для интерфейса: запросы, 429, время ожидания и доля цен, взятых из кэшей.
+    # Ожидание - реальное время, когда хотя бы один поток стоял на паузе, рядом - длительность анализа
+    # и сумма пауз по всем потокам
+    counters = snapshot["counters"]
+    requests = sum(v for k, v in counters.items() if k.startswith("http.requests."))
+    throttled = sum(v for k, v in counters.items() if k.startswith("http.throttled."))
+    prices = {k[len("price."):]: v for k, v in counters.items() if k.startswith("price.")}
+    cached = sum(v for k, v in prices.items() if k not in ("market_search", "network", "unknown"))
+    total = sum(prices.values())
+    text = (f"Запросов: {requests}, 429: {throttled}, ожидание: {counters.get('http.sleep_wall_seconds', 0):.0f} "
+            f"из {snapshot['elapsed']:.0f} с (по потокам {counters.get('http.sleep_seconds', 0):.0f} с)")
+    if total:
+        text += f", цены из кэша: {cached * 100 // total}%"
+    limits = snapshot.get("rate_limits")
+    if limits:
+        text += ", темп: " + ", ".join(f"{name} {bucket['rate']:g}/с" for name, bucket in sorted(limits.items()))
+    return text
+
+
+# Общий экземпляр, как и ограничитель запросов: сетевые функции пишут в него без передачи параметров
+METRICS = Metrics()
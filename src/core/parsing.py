@@ -0,0 +1,105 @@
+import os
+import json
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .steam_network import get_all_card_names_from_html
+
+PARSE_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+def parse_card_names(raw, encoding):
+    return get_all_card_names_from_html(raw.decode(encoding or 'utf-8', errors='replace'))
+
+
+def parse_inventory_page(raw):
+    # Из страницы инвентаря (до 2000 предметов) в основной процесс возвращаются только
+    # число предметов по classid, описания карточек: classid -> (market_hash_name, appid)
+    # и classid описанных на странице предметов, которые не являются карточками
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return None
+    if not data or 'descriptions' not in data:
+        return None
+
+    asset_counts = {}
+    for asset in data.get('assets', []):
+        classid = asset.get('classid')
+        asset_counts[classid] = asset_counts.get(classid, 0) + int(asset.get('amount', 1) or 1)
+
+    cards, other_classids = {}, set()
+    for item in data.get('descriptions', []):
+        if 'Foil' in item.get('type', ''):
+            other_classids.add(item.get('classid'))
+            continue
+        is_card, appid = False, None
+        for tag in item.get('tags', []):
+            internal_name = tag.get('internal_name', '')
+            if internal_name == 'item_class_2':
+                is_card = True
+            elif tag.get('category') == 'Game' and internal_name.startswith('app_') and appid is None:
+                appid = int(internal_name[4:])
+        if is_card and item.get('market_hash_name'):
+            cards[item['classid']] = (item['market_hash_name'], appid)
+        else:
+            other_classids.add(item.get('classid'))
+
+    last_assetid = data.get('last_assetid') if data.get('more_items') else None
+    return {"asset_counts": asset_counts, "cards": cards, "other_classids": other_classids, "last_assetid": last_assetid}
+
+
+class ParseExecutor:
+    # Пул процессов для разбора HTML, JSON и VDF: разбор не держит GIL потоков, которые ждут сеть.
+    # Если пул процессов недоступен, разбор выполняется в текущем потоке.
+    # После shutdown пул не пересоздается: потоки, которые еще не заметили отмену, разбирают в своем потоке
+    def __init__(self, max_workers=PARSE_WORKERS):
+        self.max_workers = max_workers
+        self._pool = None
+        self._inline = max_workers < 1
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def run(self, fn, *args):
+        try:
+            pool = self._get_pool()
+            if pool is None:
+                return fn(*args)
+            future = pool.submit(fn, *args)
+        except (OSError, RuntimeError, NotImplementedError, ValueError) as e:
+            if self._closed:
+                return fn(*args)
+            return self._fallback(e, fn, args)
+        try:
+            return future.result()
+        except CancelledError:
+            # Задачу снял shutdown, пока она ждала в очереди пула
+            return fn(*args)
+        except BrokenProcessPool as e:
+            return self._fallback(e, fn, args)
+
+    def _get_pool(self):
+        with self._lock:
+            if self._inline or self._closed:
+                return None
+            if self._pool is None:
+                # fork из многопоточного процесса может унаследовать захваченные блокировки
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context(method))
+            return self._pool
+
+    def _fallback(self, error, fn, args):
+        logging.warning(f"Пул процессов разбора недоступен, разбор в текущем потоке: {error}")
+        self._inline = True
+        return fn(*args)
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
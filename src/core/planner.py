@@ -0,0 +1,65 @@
+import bisect
+
+XP_PER_LEVEL = 100
+
+
+def to_cents(amount):
+    return int(round(amount * 100))
+
+
+class BudgetPlanner:
+    # Каждый скрафченный уровень значка дает одинаковые 100 XP, а стоимость очередного уровня игры
+    # не убывает (на каждый следующий крафт не хватает не меньше карточек). Поэтому при ограниченном
+    # бюджете больше всего уровней дает самый длинный доступный префикс всех уровней, отсортированных
+    # по цене. Уровни хранятся уже отсортированными в целых центах, так что новый результат
+    # вставляется бинарным поиском, а план пересчитывается одним проходом
+    def __init__(self, budget=0):
+        self.budget_cents = to_cents(budget)
+        self._costs = []
+        self._results = {}
+
+    def set_budget(self, budget):
+        self.budget_cents = to_cents(budget)
+
+    def add(self, result):
+        self.remove(result['appid'])
+        entries = [(to_cents(cost), result['appid'], i)
+                   for i, cost in enumerate(result['level_costs'][:self._plannable_levels(result)])]
+        for entry in entries:
+            bisect.insort(self._costs, entry)
+        self._results[result['appid']] = (result, entries)
+        return bool(entries)
+
+    @staticmethod
+    def _plannable_levels(result):
+        # Уровни, для которых нужна карточка с неизвестной ценой, в план не попадают: их стоимость не гарантирована.
+        # Карточка, которой не хватает count копий, нужна начиная с (len(level_costs) - count + 1)-го крафта
+        levels = len(result['level_costs'])
+        return min([levels - card['count'] for card in result['to_buy_total'] if card['price'] is None] + [levels])
+
+    def remove(self, appid):
+        _, entries = self._results.pop(appid, (None, ()))
+        for entry in entries:
+            self._costs.remove(entry)
+
+    def clear(self):
+        self._costs, self._results = [], {}
+
+    def __len__(self):
+        return len(self._results)
+
+    def plan(self):
+        chosen, spent = {}, 0
+        for cents, appid, _ in self._costs:
+            if spent + cents > self.budget_cents:
+                break
+            spent += cents
+            levels, cost = chosen.get(appid, (0, 0))
+            chosen[appid] = (levels + 1, cost + cents)
+        levels = sum(n for n, _ in chosen.values())
+        return {
+            "results": [{"result": self._results[appid][0], "levels": n, "cost": cents / 100}
+                        for appid, (n, cents) in chosen.items()],
+            "levels": levels, "xp": levels * XP_PER_LEVEL,
+            "spent": spent / 100, "left": (self.budget_cents - spent) / 100
+        }
@@ -0,0 +1,122 @@
+import time
+import threading
+from collections import deque
+from statistics import median
+
+PRICE_TTL = 6 * 3600
+# Пересчитанная цена считается устаревшей, если исходная цена или курс старше этого срока
+CONVERTED_PRICE_TTL = 3 * 24 * 3600
+# Курс выводится из цен одних и тех же карточек в двух валютах, полученных не раньше RATE_PAIR_WINDOW назад;
+# медиана последних RATE_SAMPLE_SIZE пар сглаживает округление и разброс цен на Торговой площадке
+RATE_PAIR_WINDOW = 3 * 24 * 3600
+MIN_RATE_PAIRS = 10
+RATE_SAMPLE_SIZE = 200
+
+
+class PriceStore:
+    # Цены хранятся в таблице prices кэша по ключу (market_hash_name, currency_id) вместе со временем получения.
+    # Курсы валют хранятся относительно базовой (первой валюты, для которой нашлись пары цен, ее курс равен 1),
+    # поэтому цену, известную в одной валюте, можно пересчитать в любую другую с известным курсом без запросов
+    def __init__(self, db, ttl=PRICE_TTL, converted_ttl=None):
+        self._db = db
+        self.ttl = ttl
+        # None - пересчитанным ценам доверяем независимо от возраста и не обновляем их
+        self.converted_ttl = converted_ttl
+        self._lock = threading.Lock()
+        self._pairs = {}
+        self._rates = db.get_exchange_rates()
+        base = db.get_meta("price_base_currency")
+        self._base = int(base) if base else None
+
+    def get(self, name, currency_id):
+        entry = self._db.get_price(name, currency_id)
+        if not entry:
+            return None, False
+        price, fetched_at = entry
+        return price, time.time() - fetched_at < self.ttl
+
+    def convert(self, name, currency_id):
+        with self._lock:
+            rates = dict(self._rates)
+        if currency_id not in rates:
+            return None, False
+        best = None
+        for _, other, price, fetched_at in self._db.get_price_observations([name], currency_id):
+            if other in rates and (best is None or fetched_at > best[2]):
+                best = (other, price, fetched_at)
+        if best is None:
+            return None, False
+        other, price, fetched_at = best
+        observed_at = min(fetched_at, self._rate_time(currency_id, rates), self._rate_time(other, rates))
+        fresh = self.converted_ttl is None or time.time() - observed_at < self.converted_ttl
+        return round(price * rates[currency_id][0] / rates[other][0], 2), fresh
+
+    def exchange_rate(self, from_currency_id, to_currency_id):
+        if from_currency_id == to_currency_id:
+            return 1.0
+        with self._lock:
+            source, target = self._rates.get(from_currency_id), self._rates.get(to_currency_id)
+        return target[0] / source[0] if source and target else None
+
+    def put(self, name, currency_id, price, fetched_at=None):
+        if price is not None:
+            self._db.set_prices([(name, currency_id, price, fetched_at or time.time())])
+
+    def put_many(self, prices, currency_id):
+        now = time.time()
+        prices = {name: price for name, price in prices.items() if price is not None}
+        self._db.set_prices([(name, currency_id, price, now) for name, price in prices.items()])
+        if prices:
+            self._learn_rates(prices, currency_id, now)
+
+    def _rate_time(self, currency_id, rates):
+        # Курс базовой валюты задан, а не измерен, и не устаревает
+        return time.time() if currency_id == self._base else rates[currency_id][1]
+
+    def _learn_rates(self, prices, currency_id, now):
+        # Каждая только что полученная цена образует пару с недавней ценой той же карточки в другой валюте
+        touched = set()
+        observations = self._db.get_price_observations(list(prices), currency_id, now - RATE_PAIR_WINDOW)
+        with self._lock:
+            for name, other, price, _ in observations:
+                if price <= 0 or prices[name] <= 0:
+                    continue
+                samples = self._pairs.setdefault((currency_id, other), deque(maxlen=RATE_SAMPLE_SIZE))
+                samples.append(prices[name] / price)
+                touched.add(other)
+            for other in touched:
+                self._update_rate(currency_id, other, now)
+
+    def _update_rate(self, currency_id, other, now):
+        samples = self._pairs[(currency_id, other)]
+        if len(samples) < MIN_RATE_PAIRS:
+            return
+        ratio = median(samples)
+        if not self._rates:
+            self._base = other
+            self._db.set_meta("price_base_currency", str(other))
+            self._set_rate(other, 1.0, len(samples), now)
+        # Уточняется курс валюты, цены в которой только что получены; базовая валюта остается с курсом 1
+        if other in self._rates and currency_id != self._base:
+            self._set_rate(currency_id, ratio * self._rates[other][0], len(samples), now)
+        elif currency_id in self._rates and other != self._base:
+            self._set_rate(other, self._rates[currency_id][0] / ratio, len(samples), now)
+
+    def _set_rate(self, currency_id, rate, samples, now):
+        self._rates[currency_id] = (rate, now)
+        self._db.set_exchange_rate(currency_id, rate, samples, now)
+
+
+def convert_result(result, rate):
+    # Пересчет готового результата анализа в другую валюту по курсу rate
+    def scale(price):
+        return None if price is None else round(price * rate, 2)
+
+    return dict(
+        result,
+        cost=result['cost'] * rate,
+        total_cost=result['total_cost'] * rate,
+        level_costs=[cost * rate for cost in result['level_costs']],
+        to_buy_list=[dict(card, price=scale(card['price'])) for card in result['to_buy_list']],
+        to_buy_total=[dict(card, price=scale(card['price'])) for card in result['to_buy_total']],
+    )
@@ -0,0 +1,102 @@
+import io
+import os
+import time
+import pstats
+import logging
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+PROFILE_TOP_N = 25
+
+
+def profile_dir_for(journal_path):
+    return os.path.splitext(journal_path)[0] + "_profile"
+
+
+class StageProfiler:
+    # Режим профилирования: у каждого этапа свой cProfile (повторные вызовы этапа, например для каждой
+    # игры, накапливаются в одном профиле) и замер памяти через tracemalloc. Для крупных этапов
+    # дополнительно сохраняются строки кода, на которые пришлось больше всего новых выделений.
+    # cProfile видит только свой поток, а в Python 3.12+ одновременно может работать лишь один профиль,
+    # поэтому этап, начатый во время другого, замеряется только по времени и памяти
+    def __init__(self, top_n=PROFILE_TOP_N):
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        self._profiles = {}
+        self._stages = {}
+        self._allocations = {}
+        self._owns_tracemalloc = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+
+    def stop(self):
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    @contextmanager
+    def stage(self, name, snapshot=False):
+        with self._lock:
+            profile = self._profiles.setdefault(name, cProfile.Profile())
+        tracing = tracemalloc.is_tracing()
+        before = tracemalloc.take_snapshot() if snapshot and tracing else None
+        memory_before = tracemalloc.get_traced_memory()[0]
+        if tracing:
+            tracemalloc.reset_peak()
+        try:
+            profile.enable()
+            profiled = True
+        except ValueError:
+            profiled = False
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if profiled:
+                profile.disable()
+            elapsed = time.perf_counter() - started
+            memory_after, peak = tracemalloc.get_traced_memory()
+            with self._lock:
+                stats = self._stages.setdefault(name, {"count": 0, "total": 0.0, "unprofiled": 0, "peak": 0, "allocated": 0})
+                stats["count"] += 1
+                stats["total"] += elapsed
+                stats["unprofiled"] += not profiled
+                stats["peak"] = max(stats["peak"], peak - memory_before)
+                stats["allocated"] += memory_after - memory_before
+            if before is not None and tracemalloc.is_tracing():
+                diff = tracemalloc.take_snapshot().compare_to(before, 'lineno')[:self.top_n]
+                with self._lock:
+                    self._allocations[name] = [str(line) for line in diff]
+
+    def write(self, directory, summary_name="summary.txt"):
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with self._lock:
+                stages = sorted(self._stages.items(), key=lambda item: -item[1]["total"])
+                profiles = dict(self._profiles)
+                allocations = dict(self._allocations)
+            lines = []
+            for name, stats in stages:
+                profile = profiles[name]
+                lines.append(
+                    f"== {name}: вызовов {stats['count']}, время {stats['total']:.3f} с, "
+                    f"пик памяти {stats['peak'] / 2 ** 20:.2f} МБ, прирост {stats['allocated'] / 2 ** 20:.2f} МБ"
+                    + (f", без cProfile: {stats['unprofiled']}" if stats['unprofiled'] else ""))
+                if stats["count"] > stats["unprofiled"]:
+                    profile.dump_stats(os.path.join(directory, f"{name}.prof"))
+                    buffer = io.StringIO()
+                    pstats.Stats(profile, stream=buffer).sort_stats("cumulative").print_stats(self.top_n)
+                    lines.append(buffer.getvalue().strip())
+                if name in allocations:
+                    lines.append(f"Выделения памяти (top {self.top_n}):")
+                    lines.extend(f"  {line}" for line in allocations[name])
+                lines.append("")
+            with open(os.path.join(directory, summary_name), 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines))
+        except (IOError, OSError) as e:
+            logging.error(f"Не удалось сохранить профиль: {e}")
@@ -0,0 +1,132 @@
+import time
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+# Начальная скорость (запросов в секунду), пределы адаптации и размер "пачки" для каждого хоста
+HOST_BUDGETS = {
+    "api": {"rate": 2.0, "min_rate": 0.1, "max_rate": 5.0, "burst": 4},
+    "store": {"rate": 0.5, "min_rate": 0.02, "max_rate": 1.0, "burst": 2},
+    "community": {"rate": 0.5, "min_rate": 0.02, "max_rate": 1.0, "burst": 2},
+    "market": {"rate": 0.25, "min_rate": 0.01, "max_rate": 0.5, "burst": 1},
+}
+DEFAULT_BUDGET = {"rate": 1.0, "min_rate": 0.05, "max_rate": 5.0, "burst": 2}
+
+HOST_BUCKETS = {
+    "api.steampowered.com": "api",
+    "store.steampowered.com": "store",
+    "steamcommunity.com": "community",
+}
+
+SUCCESSES_PER_INCREASE = 10
+INCREASE_FACTOR = 0.1
+THROTTLE_PENALTY = 60
+MAX_THROTTLE_PENALTY = 600
+
+
+def bucket_for_url(url):
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    bucket = HOST_BUCKETS.get(host, host)
+    if bucket == "community" and parts.path.startswith("/market"):
+        return "market"
+    return bucket
+
+
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _TokenBucket:
+    def __init__(self, rate, min_rate, max_rate, burst):
+        self.base_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.capacity = burst
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.successes = 0
+        self.penalty = THROTTLE_PENALTY
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class HostRateLimiter:
+    def __init__(self, budgets=None):
+        self._budgets = dict(HOST_BUDGETS, **(budgets or {}))
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, name):
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            bucket = _TokenBucket(**self._budgets.get(name, DEFAULT_BUDGET))
+            self._buckets[name] = bucket
+        return bucket
+
+    def configure(self, name, **budget):
+        with self._lock:
+            self._budgets[name] = dict(self._budgets.get(name, DEFAULT_BUDGET), **budget)
+            self._buckets.pop(name, None)
+
+    def acquire(self, name, cancel_event=None):
+        while True:
+            with self._lock:
+                bucket = self._bucket(name)
+                now = time.monotonic()
+                bucket.refill(now)
+                if now >= bucket.blocked_until and bucket.tokens >= 1:
+                    bucket.tokens -= 1
+                    return True
+                wait = max(bucket.blocked_until - now, (1 - bucket.tokens) / bucket.rate)
+            if cancel_event is None:
+                time.sleep(wait)
+            elif cancel_event.wait(wait):
+                return False
+
+    def on_success(self, name):
+        with self._lock:
+            bucket = self._bucket(name)
+            bucket.penalty = THROTTLE_PENALTY
+            bucket.successes += 1
+            if bucket.successes >= SUCCESSES_PER_INCREASE:
+                bucket.successes = 0
+                bucket.rate = min(bucket.max_rate, bucket.rate + bucket.base_rate * INCREASE_FACTOR)
+
+    def on_throttle(self, name, retry_after=None):
+        with self._lock:
+            bucket = self._bucket(name)
+            now = time.monotonic()
+            bucket.refill(now)
+            bucket.rate = max(bucket.min_rate, bucket.rate / 2)
+            bucket.tokens = 0.0
+            bucket.successes = 0
+            delay = retry_after if retry_after is not None else bucket.penalty
+            bucket.penalty = min(MAX_THROTTLE_PENALTY, bucket.penalty * 2)
+            bucket.blocked_until = max(bucket.blocked_until, now + delay)
+            return delay
+
+    def rates(self):
+        with self._lock:
+            now = time.monotonic()
+            return {
+                name: {
+                    "rate": round(bucket.rate, 4),
+                    "tokens": round(min(bucket.capacity, bucket.tokens + (now - bucket.updated) * bucket.rate), 2),
+                    "blocked_for": round(max(0.0, bucket.blocked_until - now), 1),
+                }
+                for name, bucket in self._buckets.items()
+            }
@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import logging
+
+RESULT_JOURNAL_FILE = "results_autosave.jsonl"
+FSYNC_EVERY = 20
+FSYNC_INTERVAL = 5.0
+
+
+class ResultsJournal:
+    # Каждый результат дописывается одной строкой JSON Lines, поэтому стоимость автосохранения
+    # не зависит от числа уже найденных игр; итоговый снимок собирается в compact().
+    # Первая строка журнала описывает запуск (SteamID и валюту), по ней находится, что можно продолжить
+    def __init__(self, path=RESULT_JOURNAL_FILE):
+        self.path = path
+        self.count = 0
+        self._run = None
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def start(self, steam_id, currency_id):
+        self._run = {"type": "run", "steam_id": steam_id, "currency_id": currency_id, "started_at": time.time()}
+
+    def append(self, result, saved_at=None):
+        if self._file is None:
+            self._file = open(self.path, 'w', encoding='utf-8')
+            if self._run:
+                self._write_line(self._run)
+        self._write_line({"type": "result", "saved_at": saved_at or time.time(), "result": result})
+        self.count += 1
+        if self._unsynced >= FSYNC_EVERY or time.monotonic() - self._last_sync >= FSYNC_INTERVAL:
+            self.sync()
+
+    def append_name(self, appid, name):
+        # Название, уточненное после сохранения результата, дописывается отдельной записью
+        if self._file is not None:
+            self._write_line({"type": "name", "appid": appid, "name": name})
+
+    def _write_line(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+
+    def sync(self):
+        if self._file is None or not self._unsynced:
+            return
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if self._file is None:
+            return
+        self.sync()
+        self._file.close()
+        self._file = None
+
+    def _records(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Последняя строка может быть оборвана при аварийном завершении
+                    logging.warning(f"Пропущена поврежденная строка журнала {self.path}")
+
+    def read(self):
+        results, names = [], {}
+        for record in self._records():
+            if record.get("type") == "result":
+                results.append(record["result"])
+            elif record.get("type") == "name":
+                names[record["appid"]] = record["name"]
+        return [dict(r, game=names[r["appid"]]) if r["appid"] in names else r for r in results]
+
+    def load_resumable(self, steam_id, currency_id, max_age):
+        # Возвращает {appid: (result, saved_at)} из прошлого запуска для того же аккаунта и валюты
+        resumable, run, now = {}, None, time.time()
+        for record in self._records():
+            if record.get("type") == "run":
+                run = record
+            elif (record.get("type") == "result" and run
+                  and run.get("steam_id") == steam_id and run.get("currency_id") == currency_id
+                  and now - record.get("saved_at", 0) < max_age):
+                resumable[record["result"]["appid"]] = (record["result"], record["saved_at"])
+        return resumable
+
+    def compact(self, snapshot_path=None):
+        self.close()
+        snapshot_path = snapshot_path or os.path.splitext(self.path)[0] + ".json"
+        tmp_path = snapshot_path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.read(), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, snapshot_path)
+        except IOError as e:
+            logging.error(f"Не удалось сохранить результаты: {e}")
@@ -1,10 +1,19 @@
 import os
 import re
 import vdf
+import mmap
+import pickle
+import hashlib
 import logging
 import platform
 
+LOCAL_CACHE_DIR = "local_cache"
+
 def find_steam_path():
+    # STEAM_PATH позволяет указать каталог Steam явно (или пустой каталог, чтобы не читать локальные кэши)
+    steam_path = os.environ.get("STEAM_PATH")
+    if steam_path:
+        return steam_path if os.path.isdir(steam_path) else None
     system = platform.system()
     try:
         if system == "Windows":
@@ -40,40 +49,194 @@ def load_local_achievements(steamid, appid):
         return set()
     try:
         with open(stats_file, "rb") as f:
-            data = vdf.binary_load(f.read())
+            data = vdf.binary_load(f)
         stats = data.get("stats", {}) or data.get("achievements", {})
         return {name for name, info in stats.items() if info.get("achieved") == 1}
     except Exception as e:
         logging.warning(f"Ошибка чтения локальных достижений {appid}: {e}")
         return set()
 
-def load_local_inventory(steamid):
+def _parse_local_inventory(path):
+    with open(path, "rb") as f:
+        data = vdf.binary_load(f)
+
+    inv_cards = {}
+    appids = set()
+    descs = data.get("rgDescriptions", {})
+
+    for info in data.get("rgInventory", {}).values():
+        desc = descs.get(info.get("classid"), {})
+        name = desc.get("market_hash_name")
+        if name and "Foil" not in desc.get("type", ""):
+            inv_cards[name] = inv_cards.get(name, 0) + 1
+            appid = desc.get("app_data", {}).get("appid")
+            if appid:
+                appids.add(int(appid))
+    return inv_cards, appids
+
+def _run_parser(parser, parse, path):
+    return parser.run(parse, path) if parser else parse(path)
+
+def load_local_inventory(steamid, parser=None):
     steam_path = find_steam_path()
     if not steam_path: return {}, set()
     inv_path = os.path.join(steam_path, "userdata", steamid, "760", "2", "inventory.vdf")
     if not os.path.isfile(inv_path):
         return {}, set()
     try:
-        with open(inv_path, "rb") as f:
-            data = vdf.binary_load(f.read())
-        
-        inv_cards = {}
-        appids = set()
-        descs = data.get("rgDescriptions", {})
-        
-        for info in data.get("rgInventory", {}).values():
-            desc = descs.get(info.get("classid"), {})
-            name = desc.get("market_hash_name")
-            if name and "Foil" not in desc.get("type", ""):
-                inv_cards[name] = inv_cards.get(name, 0) + 1
-                appid = desc.get("app_data", {}).get("appid")
-                if appid:
-                    appids.add(int(appid))
-        return inv_cards, appids
+        return _run_parser(parser, _parse_local_inventory, inv_path)
     except Exception as e:
         logging.warning(f"Ошибка чтения локального инвентаря: {e}")
         return {}, set()
 
+def _load_memoized(path, parse):
+    # Разобранный VDF сохраняется на диск вместе с размером и временем изменения исходного файла,
+    # поэтому неизменившийся кэш Steam не разбирается повторно
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    memo_path = os.path.join(LOCAL_CACHE_DIR, hashlib.sha1(path.encode('utf-8')).hexdigest() + ".pickle")
+    try:
+        with open(memo_path, "rb") as f:
+            stored_key, value = pickle.load(f)
+        if stored_key == key:
+            return value
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        pass
+
+    value = parse(path)
+    try:
+        os.makedirs(LOCAL_CACHE_DIR, exist_ok=True)
+        tmp_path = memo_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, memo_path)
+    except OSError as e:
+        logging.warning(f"Не удалось сохранить разобранный кеш {path}: {e}")
+    return value
+
+# Типы значений бинарного VDF и размеры значений фиксированной длины
+_BIN_MAP, _BIN_STRING, _BIN_WIDESTRING = 0x00, 0x01, 0x05
+_BIN_END, _BIN_END_ALT = 0x08, 0x0B
+_BIN_FIXED_SIZES = {0x02: 4, 0x03: 4, 0x04: 4, 0x06: 4, 0x07: 8, 0x0A: 8}
+
+
+class LazyPriceCache:
+    # pricecache.vdf не разбирается целиком: файл отображается в память, при первом запросе один раз
+    # строится индекс "имя карточки -> смещение записи" (поля записей при этом пропускаются без разбора),
+    # а цена разбирается только для запрошенных карточек
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        root = self._mm.find(b"\x00cache\x00")
+        self._first_entry = root + len(b"\x00cache\x00") if root != -1 else -1
+        self._offsets = None
+        self._prices = {}
+
+    def get(self, name, default=None):
+        if name not in self._prices:
+            self._prices[name] = self._lookup(name)
+        price = self._prices[name]
+        return default if price is None else price
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def _lookup(self, name):
+        if self._offsets is None:
+            self._offsets = self._build_index()
+        pos = self._offsets.get(name.encode("utf-8"))
+        return self._parse_entry(pos) if pos is not None else None
+
+    def _build_index(self):
+        offsets = {}
+        mm, pos = self._mm, self._first_entry
+        if pos == -1:
+            return offsets
+        try:
+            while True:
+                value_type = mm[pos]
+                if value_type in (_BIN_END, _BIN_END_ALT):
+                    break
+                key_end = mm.find(b"\x00", pos + 1)
+                key = mm[pos + 1:key_end]
+                pos = key_end + 1
+                if value_type == _BIN_MAP:
+                    offsets[key] = pos
+                    pos = self._skip_map(pos)
+                elif value_type == _BIN_STRING:
+                    pos = mm.find(b"\x00", pos) + 1
+                elif value_type == _BIN_WIDESTRING:
+                    pos = self._skip_widestring(pos)
+                else:
+                    pos += _BIN_FIXED_SIZES[value_type]
+        except (IndexError, KeyError):
+            logging.warning("Кеш цен поврежден, используются записи до места повреждения")
+        return offsets
+
+    def _parse_entry(self, pos):
+        fields = {}
+        mm = self._mm
+        try:
+            while True:
+                value_type = mm[pos]
+                if value_type in (_BIN_END, _BIN_END_ALT):
+                    break
+                key_end = mm.find(b"\x00", pos + 1)
+                field = mm[pos + 1:key_end]
+                pos = key_end + 1
+                if value_type == _BIN_STRING:
+                    value_end = mm.find(b"\x00", pos)
+                    fields[field] = mm[pos:value_end]
+                    pos = value_end + 1
+                elif value_type == _BIN_MAP:
+                    pos = self._skip_map(pos)
+                elif value_type == _BIN_WIDESTRING:
+                    pos = self._skip_widestring(pos)
+                else:
+                    pos += _BIN_FIXED_SIZES[value_type]
+        except (IndexError, KeyError):
+            return None
+
+        price_str = fields.get(b"lowest_price") or fields.get(b"median_price")
+        if not price_str:
+            return None
+        cleaned = re.sub(r"[^\d,.]", "", price_str.decode("utf-8", "replace")).replace(",", ".").strip(".")
+        try:
+            return float(cleaned)
+        except ValueError:
+            return None
+
+    def _skip_map(self, pos):
+        mm = self._mm
+        while True:
+            value_type = mm[pos]
+            if value_type in (_BIN_END, _BIN_END_ALT):
+                return pos + 1
+            pos = mm.find(b"\x00", pos + 1) + 1
+            if value_type == _BIN_STRING:
+                pos = mm.find(b"\x00", pos) + 1
+            elif value_type == _BIN_MAP:
+                pos = self._skip_map(pos)
+            elif value_type == _BIN_WIDESTRING:
+                pos = self._skip_widestring(pos)
+            else:
+                pos += _BIN_FIXED_SIZES[value_type]
+
+    def _skip_widestring(self, pos):
+        while self._mm[pos:pos + 2] != b"\x00\x00":
+            pos += 2
+        return pos + 2
+
+def _parse_card_sets(path):
+    with open(path, "rb") as f:
+        data = vdf.binary_load(f)
+    gamecards = data.get("CommunityCache", {}).get("GameCards", {})
+    return {appid_str: list(cards.keys()) for appid_str, cards in gamecards.items()}
+
 def load_price_cache():
     steam_path = find_steam_path()
     if not steam_path: return {}
@@ -81,30 +244,21 @@ def load_price_cache():
     if not os.path.isfile(price_cache_path):
         return {}
     try:
-        with open(price_cache_path, "rb") as f:
-            data = vdf.binary_load(f.read())
-        cache = {}
-        for name, info in data.get("cache", {}).items():
-            price_str = info.get("lowest_price") or info.get("median_price")
-            if price_str:
-                cleaned = re.sub(r"[^\d,.]", "", price_str).replace(",", ".")
-                cache[name] = float(cleaned)
-        return cache
+        if os.path.getsize(price_cache_path) == 0:
+            return {}
+        return LazyPriceCache(price_cache_path)
     except Exception as e:
         logging.warning(f"Ошибка чтения кеша цен: {e}")
         return {}
 
-def load_local_card_sets():
+def load_local_card_sets(parser=None):
     steam_path = find_steam_path()
     if not steam_path: return {}
     community_cache_path = os.path.join(steam_path, "appcache", "communitycache.vdf")
     if not os.path.isfile(community_cache_path):
         return {}
     try:
-        with open(community_cache_path, "rb") as f:
-            data = vdf.binary_load(f.read())
-        gamecards = data.get("CommunityCache", {}).get("GameCards", {})
-        return {appid_str: list(cards.keys()) for appid_str, cards in gamecards.items()}
+        return _load_memoized(community_cache_path, lambda path: _run_parser(parser, _parse_card_sets, path))
     except Exception as e:
         logging.warning(f"Ошибка чтения кеша карточек: {e}")
-        return {}
\ No newline at end of file
+        return {}
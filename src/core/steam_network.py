@@ -1,13 +1,22 @@
+import os
 import time
 import logging
 import requests
 import re
 import xml.etree.ElementTree as ET
-from bs4 import BeautifulSoup
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
 
-STEAM_API_BASE = "https://api.steampowered.com"
-STEAM_COMMUNITY_BASE = "https://steamcommunity.com"
-STEAM_STORE_API_BASE = "https://store.steampowered.com/api"
+from .metrics import METRICS
+from .rate_limiter import HostRateLimiter, HOST_BUCKETS, bucket_for_url, parse_retry_after
+
+# Адреса сервисов можно подменить через переменные окружения (например, на локальный тестовый сервер);
+# хост подмененного адреса получает тот же бюджет запросов, что и настоящий
+STEAM_API_BASE = os.environ.get("STEAM_API_BASE", "https://api.steampowered.com")
+STEAM_COMMUNITY_BASE = os.environ.get("STEAM_COMMUNITY_BASE", "https://steamcommunity.com")
+STEAM_STORE_API_BASE = os.environ.get("STEAM_STORE_API_BASE", "https://store.steampowered.com/api")
+for _base, _bucket in ((STEAM_API_BASE, "api"), (STEAM_COMMUNITY_BASE, "community"), (STEAM_STORE_API_BASE, "store")):
+    HOST_BUCKETS.setdefault(urlsplit(_base).netloc.lower(), _bucket)
 
 CURRENCIES = {
     "USD": {"id": 1, "flag": "US"}, "GBP": {"id": 2, "flag": "GB"}, "EUR": {"id": 3, "flag": "EU"},
@@ -28,10 +37,14 @@ CURRENCIES = {
     "HUF": {"id": 46, "flag": "HU"}, "RON": {"id": 47, "flag": "RO"},
 }
 
-_last_steam_request_time = 0
+RATE_LIMITER = HostRateLimiter()
+HTTP_POOL_SIZE = 16
 
-def prepare_session():
+def prepare_session(pool_size=HTTP_POOL_SIZE):
     session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
     session.headers.update({
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     })
@@ -41,26 +54,39 @@ def prepare_session():
     session.cookies.set('wants_mature_content', '1', domain='.store.steampowered.com')
     return session
 
-def safe_get(session, url, headers=None, retries=3, timeout=15, min_interval=4):
-    global _last_steam_request_time
+def safe_get(session, url, headers=None, retries=3, timeout=15, limiter=None, cancel_event=None, metrics=None):
+    limiter = limiter or RATE_LIMITER
+    metrics = metrics or METRICS
+    bucket = bucket_for_url(url)
     for attempt in range(retries):
-        elapsed = time.time() - _last_steam_request_time
-        if elapsed < min_interval:
-            time.sleep(min_interval - elapsed)
+        if attempt:
+            metrics.incr("http.retries")
+        with metrics.waiting("http.sleep"):
+            acquired = limiter.acquire(bucket, cancel_event)
+        if not acquired:
+            return None
 
+        metrics.incr(f"http.requests.{bucket}")
         try:
             response = session.get(url, timeout=timeout, headers=headers)
-            _last_steam_request_time = time.time()
+            metrics.incr(f"http.bytes.{bucket}", len(response.content))
             if response.status_code == 429:
-                logging.warning("Получен статус 429. Длинная пауза (10 минут)...")
-                time.sleep(600)
+                metrics.incr(f"http.throttled.{bucket}")
+                delay = limiter.on_throttle(bucket, parse_retry_after(response.headers.get("Retry-After")))
+                logging.warning(f"Получен статус 429 от '{bucket}'. Пауза для этого хоста: {delay:.0f} с")
                 continue
             response.raise_for_status()
+            limiter.on_success(bucket)
             return response
         except requests.exceptions.RequestException as e:
+            metrics.incr(f"http.errors.{bucket}")
             logging.warning(f"Ошибка запроса (попытка {attempt+1}/{retries}): {url} | {e}")
             if attempt < retries - 1:
-                time.sleep((attempt + 1) * 3)
+                with metrics.waiting("http.sleep"):
+                    if cancel_event is None:
+                        time.sleep((attempt + 1) * 3)
+                    elif cancel_event.wait((attempt + 1) * 3):
+                        return None
     return None
 
 def resolve_steamid64(user_input):
@@ -89,20 +115,200 @@ def resolve_steamid64(user_input):
         pass
     return None
 
-def get_all_card_names_from_html(html):
-    soup = BeautifulSoup(html, 'html.parser')
-    card_names = set()
-    
-    for card_div in soup.select('div.badge_card_set_card div.badge_card_set_text'):
-        name = card_div.get_text(strip=True)
-        if name:
-            card_names.add(name)
-
-    # Fallback selectors
-    if not card_names:
-        for n in soup.select('.gamecard_card_name'):
-            name = n.get_text(strip=True)
+def parse_price_text(price_str):
+    if not price_str:
+        return None
+    # Точка в конце остается от сокращений вроде "pуб."
+    cleaned = re.sub(r'[^\d,.]', '', price_str).replace(',', '.').strip('.')
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+def fetch_market_card_prices(session, appid, currency_id, page_size=100, cancel_event=None):
+    # Один запрос поиска по Торговой площадке возвращает весь набор карточек игры с минимальными ценами
+    prices, start, total = {}, 0, None
+    headers = {"Referer": f"{STEAM_COMMUNITY_BASE}/market/search?appid=753"}
+    while total is None or start < total:
+        url = (f"{STEAM_COMMUNITY_BASE}/market/search/render/?norender=1&appid=753"
+               f"&start={start}&count={page_size}&sort_column=name&sort_dir=asc&currency={currency_id}"
+               f"&category_753_Game[]=tag_app_{appid}"
+               f"&category_753_item_class[]=tag_item_class_2"
+               f"&category_753_cardborder[]=tag_cardborder_0")
+        response = safe_get(session, url, headers=headers, cancel_event=cancel_event)
+        if not response:
+            break
+        try:
+            data = response.json()
+        except ValueError:
+            break
+        if not data or not data.get("success"):
+            break
+
+        results = data.get("results") or []
+        for item in results:
+            name = item.get("hash_name")
+            price_text = item.get("sell_price_text")
+            # Без авторизации поиск может отдавать цены в USD независимо от параметра currency
+            if not name or not price_text or (currency_id != 1 and price_text.startswith("$")):
+                continue
+            price = parse_price_text(price_text)
+            if price is not None:
+                prices[name] = price
+
+        total = data.get("total_count", 0)
+        start += len(results)
+        if not results:
+            break
+    return prices
+
+def fetch_owned_game_names(session, api_key, steam_id, cancel_event=None):
+    url = (f"{STEAM_API_BASE}/IPlayerService/GetOwnedGames/v1/?key={api_key}&steamid={steam_id}"
+           f"&include_appinfo=1&include_played_free_games=1")
+    response = safe_get(session, url, cancel_event=cancel_event)
+    if not response:
+        return {}
+    try:
+        games = response.json().get("response", {}).get("games", [])
+    except ValueError:
+        return {}
+    return {g["appid"]: g["name"] for g in games if g.get("appid") and g.get("name")}
+
+def iter_app_list(session, api_key, page_size=50000, cancel_event=None):
+    # Полный список приложений Steam отдается страницами по page_size записей; вместе со страницей
+    # возвращается признак того, что она последняя (при сетевой ошибке генератор просто завершается)
+    last_appid = 0
+    while True:
+        url = (f"{STEAM_API_BASE}/IStoreService/GetAppList/v1/?key={api_key}&max_results={page_size}"
+               f"&last_appid={last_appid}&include_games=1&include_dlc=1&include_software=1")
+        response = safe_get(session, url, cancel_event=cancel_event)
+        if not response:
+            return
+        try:
+            data = response.json().get("response", {})
+        except ValueError:
+            return
+        is_last = not data.get("have_more_results") or not data.get("last_appid")
+        yield [(a["appid"], a["name"]) for a in data.get("apps", []) if a.get("appid") and a.get("name")], is_last
+        if is_last:
+            return
+        last_appid = data["last_appid"]
+
+# Пустые элементы HTML никогда не получают закрывающего тега
+_VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'menuitem', 'meta',
+    'param', 'source', 'track', 'wbr', 'basefont', 'bgsound', 'command', 'frame', 'image', 'isindex',
+    'nextid', 'spacer',
+}
+# Текст внутри этих тегов BeautifulSoup хранит как Script/Stylesheet/TemplateString (по ближайшему такому тегу):
+# get_text() элемента учитывает только строки того же типа, что и сам элемент
+_STRING_CONTAINER_TAGS = {'script', 'style', 'template'}
+
+
+class _CardNameExtractor(HTMLParser):
+    # Потоковый разбор страницы gamecards без построения дерева: отслеживается только стек открытых
+    # тегов и текст внутри 'div.badge_card_set_card div.badge_card_set_text' (и запасного '.gamecard_card_name').
+    # Границы текстовых узлов и обработка незакрытых тегов повторяют html.parser-сборщик BeautifulSoup,
+    # чтобы get_text(strip=True) давал тот же результат
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.card_names = set()
+        self.fallback_names = set()
+        self._stack = []
+        self._card_depth = 0
+        self._containers = []
+        self._captures = []
+        self._closed_void_tags = []
+        self._in_text = False
+
+    def handle_starttag(self, tag, attrs):
+        self._open(tag, attrs)
+        if tag in _VOID_TAGS:
+            self._close(tag)
+            self._closed_void_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self._open(tag, attrs)
+        self._close(tag)
+
+    def handle_endtag(self, tag):
+        # Явный закрывающий тег для уже закрытого пустого элемента (<br>...</br>) игнорируется
+        if tag in self._closed_void_tags:
+            self._closed_void_tags.remove(tag)
+        else:
+            self._close(tag)
+
+    def handle_data(self, data):
+        text_type = self._containers[-1] if self._containers else None
+        for _, pieces, capture_type in self._captures:
+            if capture_type != text_type:
+                continue
+            if self._in_text and pieces:
+                pieces[-1] += data
+            else:
+                pieces.append(data)
+        self._in_text = True
+
+    def handle_comment(self, data):
+        self._in_text = False
+
+    handle_decl = handle_pi = unknown_decl = handle_comment
+
+    def close(self):
+        super().close()
+        while self._stack:
+            self._pop()
+
+    def _open(self, tag, attrs):
+        self._in_text = False
+        classes = set()
+        for attr, value in attrs:
+            if attr == 'class' and value:
+                classes.update(value.split())
+
+        is_card = tag == 'div' and 'badge_card_set_card' in classes
+        captures = []
+        text_type = tag if tag in _STRING_CONTAINER_TAGS else None
+        if tag == 'div' and 'badge_card_set_text' in classes and self._card_depth:
+            captures.append((self.card_names, [], text_type))
+        if 'gamecard_card_name' in classes:
+            captures.append((self.fallback_names, [], text_type))
+
+        self._stack.append((tag, is_card, captures))
+        self._captures.extend(captures)
+        if is_card:
+            self._card_depth += 1
+        if text_type:
+            self._containers.append(tag)
+
+    def _close(self, tag):
+        self._in_text = False
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                break
+        else:
+            return
+        while len(self._stack) > index:
+            self._pop()
+
+    def _pop(self):
+        tag, is_card, captures = self._stack.pop()
+        if is_card:
+            self._card_depth -= 1
+        if tag in _STRING_CONTAINER_TAGS:
+            self._containers.pop()
+        if captures:
+            self._captures = [c for c in self._captures if not any(c is own for own in captures)]
+        for target, pieces, _ in captures:
+            name = "".join(p.strip() for p in pieces)
             if name:
-                card_names.add(name)
+                target.add(name)
+
 
-    return list(card_names)
\ No newline at end of file
+def get_all_card_names_from_html(html):
+    if 'badge_card_set_text' not in html and 'gamecard_card_name' not in html:
+        return []
+    parser = _CardNameExtractor()
+    parser.feed(html)
+    parser.close()
+    return list(parser.card_names or parser.fallback_names)
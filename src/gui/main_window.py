@@ -4,9 +4,9 @@ import configparser
 import webbrowser
 
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QTableWidget,
-    QTableWidgetItem, QHeaderView, QProgressBar, QComboBox, QHBoxLayout,
-    QMessageBox, QFrame, QGraphicsDropShadowEffect, QStackedLayout
+    QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QTableView,
+    QAbstractItemView, QHeaderView, QProgressBar, QComboBox, QHBoxLayout,
+    QMessageBox, QFrame, QGraphicsDropShadowEffect, QStackedLayout, QCheckBox, QSpinBox, QDoubleSpinBox
 )
 from PyQt6.QtCore import QThread, Qt, QPropertyAnimation, QEasingCurve
 from PyQt6.QtGui import QIcon, QColor, QFont, QMovie
@@ -26,8 +26,17 @@ STYLESHEET_FILE = os.path.join(ASSETS_DIR, 'styles.qss')
 try:
     from ..core.worker import AnalysisWorker
     from ..core.steam_network import CURRENCIES
-    from .widgets.numeric_item import NumericTableWidgetItem
+    from ..core.cache_db import CacheDB
+    from ..core.price_store import PriceStore, PRICE_TTL, convert_result
+    from ..core.planner import BudgetPlanner
+    from ..core.metrics import summarize
+    from ..core.profiling import StageProfiler, profile_dir_for
+    from ..core.results_journal import RESULT_JOURNAL_FILE
+    from .widgets.results_model import (
+        ResultsTableModel, ResultsProxyModel, DetailsButtonDelegate, RESULT_ROLE, COLUMN_ACTION
+    )
     from .widgets.card_list_dialog import CardListDialog
+    from .widgets.plan_dialog import PlanDialog
 except ImportError as e:
     # Этот блок нужен для отладки, если структура проекта нарушена
     print("Критическая ошибка: Не удалось импортировать модули.", e)
@@ -49,6 +58,9 @@ class MainWindow(QWidget):
         self.worker = None
         self.thread = None
         self.currency_symbol = "RUB"
+        self.results_currency_id = None
+        self.price_ttl_hours = PRICE_TTL / 3600
+        self.planner = BudgetPlanner()
         self.init_ui()
         self.load_settings()
 
@@ -97,6 +109,23 @@ class MainWindow(QWidget):
         self._populate_currency_combo()
         self.currency_combo.currentTextChanged.connect(self.update_currency_symbol)
         controls_layout.addWidget(self.currency_combo)
+
+        self.resume_checkbox = QCheckBox("Продолжить прерванный анализ")
+        controls_layout.addWidget(self.resume_checkbox)
+
+        self.incremental_checkbox = QCheckBox("Только изменения")
+        self.incremental_checkbox.setToolTip("Пересчитывать только игры, у которых изменились карточки или уровень значка")
+        controls_layout.addWidget(self.incremental_checkbox)
+
+        self.refresh_converted_checkbox = QCheckBox("Обновлять пересчитанные цены")
+        self.refresh_converted_checkbox.setToolTip(
+            "Цены, известные в другой валюте, пересчитываются по сохраненному курсу без запросов к Steam.\n"
+            "Если включено, заново запрашиваются только те из них, у которых устарела исходная цена или курс")
+        controls_layout.addWidget(self.refresh_converted_checkbox)
+
+        self.profile_checkbox = QCheckBox("Профилирование")
+        self.profile_checkbox.setToolTip("Сохранить профили cProfile и замеры памяти по этапам анализа рядом с результатами")
+        controls_layout.addWidget(self.profile_checkbox)
         controls_layout.addStretch()
 
         self.start_button = QPushButton("\U0001F680  Начать анализ")
@@ -118,6 +147,11 @@ class MainWindow(QWidget):
         self.status_label.setObjectName("statusLabel")
         main_layout.addWidget(self.status_label)
         
+        self.stats_label = QLabel()
+        self.stats_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.stats_label.setObjectName("statsLabel")
+        main_layout.addWidget(self.stats_label)
+
         self.progress_bar = QProgressBar()
         self.progress_bar.setTextVisible(False)
         main_layout.addWidget(self.progress_bar)
@@ -129,13 +163,28 @@ class MainWindow(QWidget):
         self.loading_spinner.setMovie(self.spinner_movie)
         main_layout.addWidget(self.loading_spinner)
 
+        main_layout.addLayout(self._create_filter_bar())
+        main_layout.addLayout(self._create_plan_bar())
+
         self.table_stack = QStackedLayout()
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(["Игра", "Стоимость", "Купить", "Действие"])
+        self.results_model = ResultsTableModel(self)
+        self.proxy_model = ResultsProxyModel(self)
+        self.proxy_model.setSourceModel(self.results_model)
+        for signal in (self.proxy_model.rowsInserted, self.proxy_model.rowsRemoved, self.proxy_model.modelReset):
+            signal.connect(self.update_filter_count)
+        # План пересчитывается пачкой вместе с добавлением строк в таблицу, а не на каждый результат
+        self.results_model.rowsInserted.connect(self.update_plan)
+        self.details_delegate = DetailsButtonDelegate(self)
+        self.details_delegate.clicked.connect(self.show_card_dialog)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy_model)
+        self.table.setItemDelegateForColumn(COLUMN_ACTION, self.details_delegate)
+        self.table.setMouseTracking(True)
+        self.table.verticalHeader().setVisible(False)
         self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.table.setSortingEnabled(True)
         self.table.setShowGrid(False)
         self.table.setAlternatingRowColors(True)
@@ -149,6 +198,94 @@ class MainWindow(QWidget):
         self.table_stack.addWidget(self.table)
         main_layout.addLayout(self.table_stack)
 
+    def _create_filter_bar(self):
+        filter_layout = QHBoxLayout()
+        filter_layout.setSpacing(12)
+
+        self.name_filter_input = QLineEdit()
+        self.name_filter_input.setPlaceholderText("Поиск по названию...")
+        self.name_filter_input.setClearButtonEnabled(True)
+        self.name_filter_input.textChanged.connect(self.apply_filter)
+        filter_layout.addWidget(self.name_filter_input, 1)
+
+        # Минимальное значение поля (на шаг ниже нуля) означает отсутствие ограничения,
+        # поэтому 0 остается настоящей границей
+        filter_layout.addWidget(QLabel("Стоимость:"))
+        self.cost_min_input, self.cost_max_input = QDoubleSpinBox(), QDoubleSpinBox()
+        for spin_box, hint in ((self.cost_min_input, "от"), (self.cost_max_input, "до")):
+            spin_box.setDecimals(2)
+            spin_box.setRange(-0.01, 1_000_000)
+            spin_box.setValue(spin_box.minimum())
+            spin_box.setMaximumWidth(130)
+            spin_box.setSpecialValueText(hint)
+            spin_box.valueChanged.connect(self.apply_filter)
+            filter_layout.addWidget(spin_box)
+
+        filter_layout.addWidget(QLabel("Купить:"))
+        self.to_buy_min_input, self.to_buy_max_input = QSpinBox(), QSpinBox()
+        for spin_box, hint in ((self.to_buy_min_input, "от"), (self.to_buy_max_input, "до")):
+            spin_box.setRange(-1, 1000)
+            spin_box.setValue(spin_box.minimum())
+            spin_box.setMaximumWidth(100)
+            spin_box.setSpecialValueText(hint)
+            spin_box.valueChanged.connect(self.apply_filter)
+            filter_layout.addWidget(spin_box)
+
+        self.filter_count_label = QLabel()
+        self.filter_count_label.setObjectName("filterCountLabel")
+        filter_layout.addWidget(self.filter_count_label)
+        return filter_layout
+
+    def _create_plan_bar(self):
+        plan_layout = QHBoxLayout()
+        plan_layout.setSpacing(12)
+        plan_layout.addWidget(QLabel("Бюджет:"))
+        self.budget_input = QDoubleSpinBox()
+        self.budget_input.setRange(0, 1_000_000)
+        self.budget_input.setDecimals(2)
+        self.budget_input.setMaximumWidth(130)
+        self.budget_input.valueChanged.connect(self.update_plan)
+        plan_layout.addWidget(self.budget_input)
+
+        self.plan_label = QLabel("Укажите бюджет, чтобы подобрать значки для крафта.")
+        self.plan_label.setObjectName("planLabel")
+        plan_layout.addWidget(self.plan_label, 1)
+
+        self.plan_button = QPushButton("План...")
+        self.plan_button.setObjectName("planButton")
+        self.plan_button.setEnabled(False)
+        self.plan_button.clicked.connect(self.show_plan_dialog)
+        plan_layout.addWidget(self.plan_button)
+        return plan_layout
+
+    def update_plan(self):
+        self.planner.set_budget(self.budget_input.value())
+        plan = self.planner.plan()
+        self.plan_button.setEnabled(bool(plan['results']))
+        if not self.budget_input.value():
+            self.plan_label.setText("Укажите бюджет, чтобы подобрать значки для крафта.")
+        else:
+            self.plan_label.setText(
+                f"Можно скрафтить {plan['levels']} уровней значков (+{plan['xp']} XP) "
+                f"за {plan['spent']:.2f} {self.currency_symbol}, останется {plan['left']:.2f}"
+            )
+
+    def show_plan_dialog(self):
+        PlanDialog(self.planner.plan(), self.currency_symbol, self).exec()
+
+    def apply_filter(self):
+        def bound(spin_box):
+            return None if spin_box.value() == spin_box.minimum() else spin_box.value()
+        self.proxy_model.set_filter(
+            self.name_filter_input.text(),
+            (bound(self.cost_min_input), bound(self.cost_max_input)),
+            (bound(self.to_buy_min_input), bound(self.to_buy_max_input))
+        )
+
+    def update_filter_count(self):
+        shown, total = self.proxy_model.rowCount(), self.proxy_model.source_count()
+        self.filter_count_label.setText(f"{shown} из {total}" if total else "")
+
     def apply_shadow(self, widget):
         shadow = QGraphicsDropShadowEffect(self)
         shadow.setBlurRadius(20)
@@ -165,7 +302,40 @@ class MainWindow(QWidget):
         return self.currency_combo.currentData()
 
     def update_currency_symbol(self, text):
-        self.currency_symbol = CURRENCIES.get(self._get_selected_currency_code(), {}).get('code', 'RUB')
+        # Суммы в плане и диалогах подписываются валютой, в которой посчитаны результаты,
+        # поэтому при уже полученных результатах символ меняется только вместе с их пересчетом
+        if self.results_currency_id is None or self.convert_results():
+            self.currency_symbol = self._get_selected_currency_code() or 'RUB'
+        self.update_plan()
+
+    def convert_results(self):
+        # Результаты завершенного анализа пересчитываются в новую валюту по курсу из кэша, без запросов к Steam
+        currency_id = CURRENCIES[self._get_selected_currency_code()]['id']
+        if currency_id == self.results_currency_id:
+            return True
+        if self.thread and self.thread.isRunning():
+            self.status_label.setText("Выбранная валюта будет использована при следующем анализе.")
+            return False
+        cache = CacheDB()
+        try:
+            rate = PriceStore(cache).exchange_rate(self.results_currency_id, currency_id)
+        finally:
+            cache.close()
+        if rate is None:
+            self.status_label.setText("Курс для пересчета пока неизвестен: результаты остаются в прежней валюте, "
+                                      "запустите анализ в выбранной.")
+            return False
+
+        results = [convert_result(result, rate) for result in self.results_model.results()]
+        self.results_model.clear()
+        self.planner.clear()
+        for result in results:
+            self.results_model.add_result(result)
+            self.planner.add(result)
+        self.results_model.flush()
+        self.results_currency_id = currency_id
+        self.status_label.setText(f"Цены пересчитаны в {self._get_selected_currency_code()} по сохраненному курсу.")
+        return True
 
     def start_analysis(self):
         api_key = self.api_key_input.text().strip()
@@ -177,7 +347,10 @@ class MainWindow(QWidget):
             return
         
         self.table_stack.setCurrentWidget(self.table)
-        self.table.setRowCount(0)
+        self.results_model.clear()
+        self.stats_label.clear()
+        self.planner.clear()
+        self.update_plan()
         self.status_label.setText("Подготовка к анализу...")
         self.progress_bar.setValue(0)
         self.progress_bar.setFormat("")
@@ -188,12 +361,25 @@ class MainWindow(QWidget):
         
         self.save_settings()
         currency_id = CURRENCIES[currency_code]['id']
+        self.results_currency_id = currency_id
+        self.currency_symbol = currency_code
+        self.results_model.profiler = StageProfiler() if self.profile_checkbox.isChecked() else None
         self.thread = QThread()
-        self.worker = AnalysisWorker(api_key, user_id, currency_id)
+        self.worker = AnalysisWorker(
+            api_key, user_id, currency_id,
+            price_ttl=self.price_ttl_hours * 3600,
+            resume=self.resume_checkbox.isChecked(),
+            incremental=self.incremental_checkbox.isChecked(),
+            profile=self.profile_checkbox.isChecked(),
+            refresh_converted=self.refresh_converted_checkbox.isChecked()
+        )
         self.worker.moveToThread(self.thread)
 
         self.worker.progress_update.connect(self.update_progress)
-        self.worker.result_ready.connect(self.add_result_to_table)
+        self.worker.result_ready.connect(self.results_model.add_result)
+        self.worker.result_ready.connect(self.planner.add)
+        self.worker.name_resolved.connect(self.results_model.update_game_name)
+        self.worker.stats_updated.connect(self.update_stats)
         self.worker.finished.connect(self.on_analysis_finished)
         self.worker.error_occurred.connect(self.on_error)
         
@@ -207,11 +393,15 @@ class MainWindow(QWidget):
             self.worker.cancel()
 
     def on_analysis_finished(self):
-        if self.table.rowCount() == 0:
+        self.results_model.flush()
+        if self.results_model.profiler:
+            self.results_model.profiler.write(profile_dir_for(RESULT_JOURNAL_FILE), "gui_summary.txt")
+            self.results_model.profiler = None
+        if self.results_model.rowCount() == 0:
             self.table_stack.setCurrentWidget(self.placeholder_label)
         
         current_status = self.status_label.text()
-        if self.worker and self.worker._is_cancelled:
+        if self.worker and self.worker.is_cancelled:
             self.status_label.setText("Анализ был отменен пользователем.")
         elif "ошибка" not in current_status.lower():
             self.status_label.setText("Анализ завершен!")
@@ -231,6 +421,9 @@ class MainWindow(QWidget):
         self.status_label.setText(f"Ошибка: {message}")
         self.on_analysis_finished()
 
+    def update_stats(self, report):
+        self.stats_label.setText(summarize(report))
+
     def show_error_message(self, text, title="Ошибка"):
         msg_box = QMessageBox(self)
         msg_box.setStyleSheet(self.styleSheet())
@@ -245,39 +438,19 @@ class MainWindow(QWidget):
         self.progress_bar.setFormat(f"{value} / {maximum}")
         self.status_label.setText(text)
 
-    def add_result_to_table(self, result):
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-
-        game_item = QTableWidgetItem(result['game'])
-        game_item.setData(Qt.ItemDataRole.UserRole, result)
-        self.table.setItem(row, 0, game_item)
-        
-        cost_item = NumericTableWidgetItem(f"{result['cost']:.2f}")
-        cost_item.setData(Qt.ItemDataRole.UserRole, result['cost'])
-        self.table.setItem(row, 1, cost_item)
-
-        buy_count_item = NumericTableWidgetItem(str(result['to_buy_count']))
-        buy_count_item.setData(Qt.ItemDataRole.UserRole, result['to_buy_count'])
-        self.table.setItem(row, 2, buy_count_item)
-        
-        if result['to_buy_count'] > 0:
-            details_button = QPushButton("Показать...")
-            details_button.setStyleSheet("padding: 5px; font-size: 9pt;")
-            details_button.clicked.connect(lambda _, r=result: self.show_card_dialog(r))
-            self.table.setCellWidget(row, 3, details_button)
-
     def show_card_dialog(self, result_data):
         dialog = CardListDialog(
             result_data['game'], 
-            result_data['to_buy_list'], 
-            self._get_selected_currency_code(), 
+            result_data['to_buy_total'],
+            self.currency_symbol,
             self
         )
         dialog.exec()
         
     def open_game_page_from_table(self, mi):
-        result_data = self.table.item(mi.row(), 0).data(Qt.ItemDataRole.UserRole)
+        if mi.column() == COLUMN_ACTION:
+            return
+        result_data = mi.data(RESULT_ROLE)
         if result_data and result_data.get('appid'):
             webbrowser.open(f"https://store.steampowered.com/app/{result_data['appid']}")
 
@@ -286,7 +459,9 @@ class MainWindow(QWidget):
         config['Steam'] = {
             'api_key': self.api_key_input.text(),
             'user_id': self.user_id_input.text(),
-            'currency': self._get_selected_currency_code() or 'RUB'
+            'currency': self._get_selected_currency_code() or 'RUB',
+            'price_ttl_hours': str(self.price_ttl_hours),
+            'budget': str(self.budget_input.value())
         }
         with open(CONFIG_FILE, 'w', encoding='utf-8') as configfile:
             config.write(configfile)
@@ -296,6 +471,8 @@ class MainWindow(QWidget):
         if config.read(CONFIG_FILE, encoding='utf-8'):
             self.api_key_input.setText(config.get('Steam', 'api_key', fallback=''))
             self.user_id_input.setText(config.get('Steam', 'user_id', fallback=''))
+            self.price_ttl_hours = config.getfloat('Steam', 'price_ttl_hours', fallback=self.price_ttl_hours)
+            self.budget_input.setValue(config.getfloat('Steam', 'budget', fallback=0))
             currency_code = config.get('Steam', 'currency', fallback='RUB')
             index = self.currency_combo.findData(currency_code)
             if index != -1:
@@ -11,13 +11,13 @@ class CardListDialog(QDialog):
         self.setStyleSheet(parent.styleSheet() if parent else "")
 
         layout = QVBoxLayout(self)
-        label = QLabel("Кликните по карточке, чтобы открыть ее на Торговой площадке:")
+        label = QLabel("Карточки, которых не хватает до 5 уровня значка.\nКликните по карточке, чтобы открыть ее на Торговой площадке:")
         layout.addWidget(label)
 
         self.list_widget = QListWidget()
         for card in cards_to_buy:
             price_str = f"~{card['price']:.2f} {currency_symbol}" if card['price'] is not None else "Цена неизвестна"
-            item_text = f"{card['name']} ({price_str})"
+            item_text = f"{card['name']} ×{card['count']} ({price_str})"
             
             # Используем requests.utils.quote для корректного кодирования URL
             url_name = requests.utils.quote(card['name'])
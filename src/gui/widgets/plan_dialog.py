@@ -0,0 +1,32 @@
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel, QListWidget, QListWidgetItem
+from PyQt6.QtCore import Qt, QUrl
+from PyQt6.QtGui import QDesktopServices
+
+class PlanDialog(QDialog):
+    def __init__(self, plan, currency_symbol, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("План крафта значков")
+        self.setMinimumSize(500, 400)
+        self.setStyleSheet(parent.styleSheet() if parent else "")
+
+        layout = QVBoxLayout(self)
+        label = QLabel(
+            f"Уровней значков: {plan['levels']} (+{plan['xp']} XP), потрачено {plan['spent']:.2f} {currency_symbol}, "
+            f"останется {plan['left']:.2f} {currency_symbol}.\nКликните по игре, чтобы открыть страницу ее значка:"
+        )
+        layout.addWidget(label)
+
+        self.list_widget = QListWidget()
+        for entry in plan['results']:
+            result = entry['result']
+            list_item = QListWidgetItem(f"{result['game']} — +{entry['levels']} ур. за {entry['cost']:.2f} {currency_symbol}")
+            list_item.setData(Qt.ItemDataRole.UserRole, f"https://steamcommunity.com/my/gamecards/{result['appid']}")
+            self.list_widget.addItem(list_item)
+
+        self.list_widget.itemClicked.connect(self.open_link)
+        layout.addWidget(self.list_widget)
+
+    def open_link(self, item):
+        url = item.data(Qt.ItemDataRole.UserRole)
+        if url:
+            QDesktopServices.openUrl(QUrl(url))
@@ -0,0 +1,307 @@
+from contextlib import nullcontext
+
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyleOptionButton, QStyle, QApplication
+from PyQt6.QtCore import (
+    Qt, QAbstractTableModel, QAbstractProxyModel, QModelIndex, QTimer, QEvent, QRect, pyqtSignal
+)
+
+RESULT_ROLE = Qt.ItemDataRole.UserRole
+SORT_ROLE = Qt.ItemDataRole.UserRole + 1
+
+COLUMN_GAME, COLUMN_COST, COLUMN_TO_BUY, COLUMN_TOTAL, COLUMN_ACTION = range(5)
+HEADERS = ["Игра", "Стоимость", "Купить", "До 5 ур.", "Действие"]
+FLUSH_INTERVAL_MS = 150
+
+
+class ResultsTableModel(QAbstractTableModel):
+    # Результаты копятся в буфере и добавляются в модель пачкой по таймеру,
+    # поэтому представление обновляется несколько раз в секунду, а не на каждую игру
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._pending = []
+        self._row_by_appid = {}
+        # Типизированные ключи сортировки и фильтра считаются один раз при добавлении строки
+        self._keys = {COLUMN_GAME: [], COLUMN_COST: [], COLUMN_TO_BUY: [], COLUMN_TOTAL: []}
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(FLUSH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self.flush)
+        # В режиме профилирования вставка строк в таблицу замеряется как отдельный этап
+        self.profiler = None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        result = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == COLUMN_GAME:
+                return result['game']
+            if column == COLUMN_COST:
+                return f"{result['cost']:.2f}"
+            if column == COLUMN_TO_BUY:
+                return str(result['to_buy_count'])
+            if column == COLUMN_TOTAL:
+                return f"{result['total_cost']:.2f}"
+            return None
+        if role == SORT_ROLE:
+            return self.sort_keys(column)[index.row()]
+        if role == RESULT_ROLE:
+            return result
+        return None
+
+    def add_result(self, result):
+        self._pending.append(result)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self):
+        self._flush_timer.stop()
+        if not self._pending:
+            return
+        with self.profiler.stage("gui.table_insert") if self.profiler else nullcontext():
+            self._insert_pending()
+
+    def _insert_pending(self):
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(self._pending) - 1)
+        for offset, result in enumerate(self._pending):
+            self._row_by_appid[result['appid']] = first + offset
+        self._keys[COLUMN_GAME].extend(r['game'].lower() for r in self._pending)
+        self._keys[COLUMN_COST].extend(float(r['cost']) for r in self._pending)
+        self._keys[COLUMN_TO_BUY].extend(int(r['to_buy_count']) for r in self._pending)
+        self._keys[COLUMN_TOTAL].extend(float(r['total_cost']) for r in self._pending)
+        self._rows.extend(self._pending)
+        self._pending = []
+        self.endInsertRows()
+
+    def clear(self):
+        self._flush_timer.stop()
+        self.beginResetModel()
+        self._rows, self._pending, self._row_by_appid = [], [], {}
+        for keys in self._keys.values():
+            keys.clear()
+        self.endResetModel()
+
+    def sort_keys(self, column):
+        # Колонка "Действие" сортируется по числу недостающих карточек
+        return self._keys.get(column, self._keys[COLUMN_TO_BUY])
+
+    def results(self):
+        return self._rows + self._pending
+
+    def total_count(self):
+        return len(self._rows) + len(self._pending)
+
+    def update_game_name(self, appid, name):
+        for result in self._pending:
+            if result['appid'] == appid:
+                result['game'] = name
+        row = self._row_by_appid.get(appid)
+        if row is not None:
+            self._rows[row]['game'] = name
+            self._keys[COLUMN_GAME][row] = name.lower()
+            index = self.index(row, COLUMN_GAME)
+            self.dataChanged.emit(index, index)
+
+
+class ResultsProxyModel(QAbstractProxyModel):
+    # Фильтр и сортировка работают по готовым ключам модели, а не через data() на каждое сравнение,
+    # поэтому пересортировка и фильтрация 10 тыс. строк укладываются в несколько миллисекунд.
+    # _rows хранит прошедшие фильтр строки источника по возрастанию ключа; убывание - это обратный обход
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._sort_column = -1
+        self._descending = False
+        self._name_filter = ""
+        self._cost_range = (None, None)
+        self._to_buy_range = (None, None)
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self._on_source_reset)
+        model.rowsInserted.connect(self._on_rows_inserted)
+        model.dataChanged.connect(self._on_data_changed)
+        self.set_filter()
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not 0 <= row < len(self._rows) or not 0 <= column < self.columnCount():
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() or self.sourceModel() is None else self.sourceModel().columnCount()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        return self.sourceModel().headerData(section, orientation, role)
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(self._rows[self._position(proxy_index.row())], proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        try:
+            position = self._rows.index(source_index.row())
+        except ValueError:
+            return QModelIndex()
+        return self.createIndex(self._position(position), source_index.column())
+
+    def _position(self, row):
+        # Позиция в _rows и номер строки прокси переводятся друг в друга одинаково
+        return len(self._rows) - 1 - row if self._descending else row
+
+    def set_filter(self, name="", cost_range=(None, None), to_buy_range=(None, None)):
+        self._name_filter = name.strip().lower()
+        self._cost_range = cost_range
+        self._to_buy_range = to_buy_range
+        self.beginResetModel()
+        self._rows = self._sorted(self._accepted(range(self.sourceModel().rowCount())))
+        self.endResetModel()
+
+    def source_count(self):
+        return self.sourceModel().rowCount()
+
+    def _accepted(self, rows):
+        model = self.sourceModel()
+        rows = list(rows)
+        if self._name_filter:
+            names, needle = model.sort_keys(COLUMN_GAME), self._name_filter
+            rows = [r for r in rows if needle in names[r]]
+        for column, (low, high) in ((COLUMN_COST, self._cost_range), (COLUMN_TO_BUY, self._to_buy_range)):
+            keys = model.sort_keys(column)
+            if low is not None:
+                rows = [r for r in rows if keys[r] >= low]
+            if high is not None:
+                rows = [r for r in rows if keys[r] <= high]
+        return rows
+
+    def _sorted(self, rows):
+        rows = sorted(rows)
+        if self._sort_column >= 0:
+            rows.sort(key=self.sourceModel().sort_keys(self._sort_column).__getitem__)
+        return rows
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        sources = [self.mapToSource(i) for i in persistent]
+        self._sort_column = column
+        self._descending = column >= 0 and order == Qt.SortOrder.DescendingOrder
+        self._rows = self._sorted(self._rows)
+        self.changePersistentIndexList(persistent, [self.mapFromSource(i) for i in sources])
+        self.layoutChanged.emit()
+
+    def _insertion_point(self, row):
+        if self._sort_column < 0:
+            return len(self._rows)
+        keys = self.sourceModel().sort_keys(self._sort_column)
+        key, low, high = keys[row], 0, len(self._rows)
+        while low < high:
+            middle = (low + high) // 2
+            if key < keys[self._rows[middle]]:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def _insert(self, row):
+        position = self._insertion_point(row)
+        proxy_row = len(self._rows) - position if self._descending else position
+        self.beginInsertRows(QModelIndex(), proxy_row, proxy_row)
+        self._rows.insert(position, row)
+        self.endInsertRows()
+
+    def _remove(self, position):
+        proxy_row = self._position(position)
+        self.beginRemoveRows(QModelIndex(), proxy_row, proxy_row)
+        del self._rows[position]
+        self.endRemoveRows()
+
+    def _on_source_reset(self):
+        self._rows = self._sorted(self._accepted(range(self.sourceModel().rowCount())))
+        self.endResetModel()
+
+    def _on_rows_inserted(self, parent, first, last):
+        rows = self._accepted(range(first, last + 1))
+        if self._sort_column < 0:
+            # Без сортировки строки идут в порядке источника, новые просто дописываются в конец
+            if rows:
+                self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(rows) - 1)
+                self._rows.extend(rows)
+                self.endInsertRows()
+            return
+        for row in rows:
+            self._insert(row)
+
+    def _on_data_changed(self, top_left, bottom_right, roles=()):
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            try:
+                position = self._rows.index(row)
+            except ValueError:
+                position = None
+            accepted = bool(self._accepted((row,)))
+            if position is not None and (not accepted or self._sort_column == COLUMN_GAME):
+                # Уточненное название может вывести строку из фильтра или сдвинуть ее при сортировке по имени
+                self._remove(position)
+                position = None
+            if position is None:
+                if accepted:
+                    self._insert(row)
+                continue
+            proxy_row = self._position(position)
+            self.dataChanged.emit(self.index(proxy_row, top_left.column()),
+                                  self.index(proxy_row, bottom_right.column()), roles)
+
+
+class DetailsButtonDelegate(QStyledItemDelegate):
+    # Кнопка "Показать..." рисуется делегатом, без отдельного виджета на каждую строку
+    clicked = pyqtSignal(dict)
+
+    def paint(self, painter, option, index):
+        result = index.data(RESULT_ROLE)
+        if not result or not result['to_buy_total']:
+            super().paint(painter, option, index)
+            return
+        button = QStyleOptionButton()
+        button.rect = self._button_rect(option.rect)
+        button.text = "Показать..."
+        button.state = QStyle.StateFlag.State_Enabled
+        if option.state & QStyle.StateFlag.State_MouseOver:
+            button.state |= QStyle.StateFlag.State_MouseOver
+        # Стиль виджета таблицы учитывает QSS приложения, в отличие от QApplication.style()
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.Type.MouseButtonRelease and self._button_rect(option.rect).contains(event.position().toPoint()):
+            result = index.data(RESULT_ROLE)
+            if result and result['to_buy_total']:
+                self.clicked.emit(result)
+                return True
+        return super().editorEvent(event, model, option, index)
+
+    @staticmethod
+    def _button_rect(rect):
+        return QRect(rect.x() + 4, rect.y() + 4, rect.width() - 8, rect.height() - 8)